@@ -13,10 +13,10 @@ bl_info = {
 import bpy
 from bpy_extras.io_utils import ExportHelper
 from bpy.props import IntProperty, BoolProperty, StringProperty, EnumProperty
-from . import nn
-from . import nn_general as nnGeneral
-from . import nn_model as nnModel
-import struct, os
+import struct, os, re
+
+# the exporter modules (nn, nn_general, nn_model) are imported where they're used,
+# so enabling the addon at Blender startup doesn't have to load them
 
 export_types = (
     ("model", "Character Model", "Exports a character GNO model"),
@@ -37,53 +37,72 @@ texture_types = (
     ("emissive", "Emission Texture", "Uses this texture as an emissive texture in-game"),
 )
 
+def _atomic_write(filepath, *data):
+    """
+    Writes data out to a temporary file and swaps it in, so a failed write never leaves a half written file behind
+    """
+    temp_filepath = filepath + ".tmp"
+    try:
+        with open(temp_filepath, 'wb') as output:
+            for chunk in data:
+                output.write(chunk)
+        os.replace(temp_filepath, filepath)
+    except:
+        if os.path.exists(temp_filepath):
+            os.remove(temp_filepath)
+        raise
+
 def write_model(context, **keywords):
-    with nnModel.File(keywords["filepath"], 'wb') as file:
+    from . import nn, nn_general as nnGeneral, nn_model as nnModel
+
+    filepath = keywords["filepath"]
+    include_texture_list = keywords["include_texture_list"]
+
+    # the whole model is built in memory, then patched and written out to disk in one go
+    with nnModel.File(filepath, 'wb', in_memory=True) as file:
         NGOB_header_offset, offset_to_NOF0, NGOB_size, main_object_data_offset = \
             nn.write_new_gno_file(file, **keywords)
 
-    if NGOB_header_offset is None:
-        return False
-    
-    data = struct.pack('<I', NGOB_size-0x8)
-    data += struct.pack('>I', main_object_data_offset)
-    with nnModel.File(keywords["filepath"], 'r+b') as file: # replace bytes
-        file.seek(NGOB_header_offset + 0x4)
-        file.write(data)
-        file.seek(0)
-        content = file.fileobject.read()
-
-    with nnModel.File(keywords["filepath"], 'wb') as file: # prepend to start
-        if keywords["include_texture_list"]:
-            NGOB_header_index = 2
-        else:
-            NGOB_header_index = 1
-        
-        data = nnGeneral.generate_NGIF_header(offset_to_NOF0 + 0x20, NGOB_header_index)
-        file.write(data + content)
+        if NGOB_header_offset is None:
+            return False
+
+        with file.getbuffer() as content: # replace bytes
+            nn.UINT_LE.pack_into(content, NGOB_header_offset + 0x4, NGOB_size-0x8)
+            nn.UINT_BE.pack_into(content, NGOB_header_offset + 0x8, main_object_data_offset)
+
+            if include_texture_list:
+                NGOB_header_index = 2
+            else:
+                NGOB_header_index = 1
+
+            data = nnGeneral.generate_NGIF_header(offset_to_NOF0 + 0x20, NGOB_header_index)
+            _atomic_write(filepath, data, content) # prepend to start
 
     return True
 
 def write_splines(context, **keywords):
-    with nnModel.File(keywords["filepath"], 'wb') as file:
+    from . import nn, nn_model as nnModel
+
+    filepath = keywords["filepath"]
+
+    # same as models, build it in memory, patch the offsets in place and write it out once
+    with nnModel.File(filepath, 'wb', in_memory=True) as file:
         spline_info_offsets, spline_data_offsets = nn.write_new_spline_file(file)
 
-    with nnModel.File(keywords["filepath"], 'r+b') as file: # replace bytes
-        file.seek(0xC)
-        for key in spline_info_offsets:
-            offset = spline_info_offsets[key]
-            file.write_int(offset)
+        with file.getbuffer() as content: # replace bytes
+            struct.pack_into('>{}I'.format(len(spline_info_offsets)), content, 0xC, *spline_info_offsets.values())
 
-        for key in spline_info_offsets:
-            offset = spline_info_offsets[key]
-            data = spline_data_offsets[key]
-            file.seek(offset)
-            for off in data:
-                file.write_int(off)
+            for key, spline_info_offset in spline_info_offsets.items():
+                data_offsets = spline_data_offsets[key]
+                struct.pack_into('>{}I'.format(len(data_offsets)), content, spline_info_offset, *data_offsets)
+
+            _atomic_write(filepath, content)
 
     return True
 
 def write_file(context, **keywords):
+    from . import nn_general as nnGeneral
+
     success = False
     if keywords["format"] == "model":
         success = write_model(context, **keywords)
@@ -98,62 +117,74 @@ def write_file(context, **keywords):
     else:
         return {'CANCELLED'}
     
+# everything up to and including the second underscore, then the bone number
+BONE_NUMBER_PATTERN = re.compile(r"([^_]*_[^_]*_)(.*)", re.DOTALL)
+
+def get_mesh_list(context, all_meshes: bool):
+    """
+    Returns the meshes in the scene, or just the active object
+    """
+    if not all_meshes:
+        return [context.active_object]
+    return [obj for obj in context.scene.objects if obj.type == "MESH"]
+
+def rename_vertex_groups(context, all_meshes: bool, rename):
+    """
+    Applies rename to the vertex groups of the selected meshes. rename returns the new name, or None to leave the group alone
+    """
+    # work out every new name first, then do the (slow) writes back to blender
+    # meshes without any vertex groups are skipped outright
+    vertex_group_lists = [obj.vertex_groups for obj in get_mesh_list(context, all_meshes)
+        if obj is not None and obj.vertex_groups]
+
+    pending = [(vgroup, newname) for vertex_groups in vertex_group_lists
+        for vgroup in vertex_groups
+        if (newname := rename(vgroup.name)) is not None and newname != vgroup.name]
+
+    for vgroup, newname in pending:
+        vgroup.name = newname
+
 def rename_mesh_groups(context, all_meshes: bool):
     """
     Renames all of the vertex groups of a mesh with the given prefix.
     """
     prefix = context.scene.gnoVGroupHelperSettings.prefix
-    mesh_list = [obj for obj in context.scene.objects if obj.type == "MESH"] if all_meshes \
-        else [context.active_object]
-
-    for obj in mesh_list:
-        for vgroup in obj.vertex_groups:
-            prefix_end = vgroup.name.index("_")
-            newname = prefix + vgroup.name[prefix_end:]
-            vgroup.name = newname
-
-def find_nth(haystack, needle, n):
-    start = haystack.find(needle)
-    while start >= 0 and n > 1:
-        start = haystack.find(needle, start+len(needle))
-        n -= 1
-    return start
+
+    def rename(name):
+        _, separator, rest = name.partition("_")
+        if not separator:
+            return None
+        return prefix + separator + rest
+
+    rename_vertex_groups(context, all_meshes, rename)
 
 def rename_remove_leading_zeroes(context, all_meshes: bool):
     """
     Renames all of the vertex groups of a mesh in a way that removes leading zeroes from the bone number
     """
 
-    mesh_list = [obj for obj in context.scene.objects if obj.type == "MESH"] if all_meshes \
-        else [context.active_object]
+    def rename(name):
+        match = BONE_NUMBER_PATTERN.match(name)
+        if not match:
+            return None
+        name_start, number = match.groups()
+        return name_start + number.lstrip("0")
 
-    for mesh in mesh_list:
-        for vgroup in mesh.vertex_groups:
-            number_start = find_nth(vgroup.name, "_", 2)
-            if number_start == -1:
-                continue
-            number_start += 1
-            number = vgroup.name[number_start:].lstrip("0")
-            newname = vgroup.name[:number_start] + number
-            vgroup.name = newname
+    rename_vertex_groups(context, all_meshes, rename)
 
 def rename_add_leading_zeroes(context, all_meshes: bool):
     """
     Renames all of the vertex groups of a mesh in a way that adds leading zeroes to the bone number
     """
-    
-    mesh_list = [obj for obj in context.scene.objects if obj.type == "MESH"] if all_meshes \
-        else [context.active_object]
-    
-    for mesh in mesh_list:
-        for vgroup in mesh.vertex_groups:
-            number_start = find_nth(vgroup.name, "_", 2)
-            if number_start == -1:
-                continue
-            number_start += 1
-            number = vgroup.name[number_start:].zfill(4)
-            newname = vgroup.name[:number_start] + number
-            vgroup.name = newname
+
+    def rename(name):
+        match = BONE_NUMBER_PATTERN.match(name)
+        if not match:
+            return None
+        name_start, number = match.groups()
+        return name_start + number.zfill(4)
+
+    rename_vertex_groups(context, all_meshes, rename)
 
 class ExportGNO(bpy.types.Operator, ExportHelper):
     """Exports a Sega GNO model for the GameCube version of Sonic Riders"""
@@ -230,8 +261,11 @@ class GnoVertexGroups(bpy.types.Operator):
     bl_label = "Create Vertex Groups"
 
     def execute(self, context):
+        from . import nn_model as nnModel
+
         mesh = context.active_object
-        nnModel.create_vertex_groups(mesh)
+        created = nnModel.create_vertex_groups(mesh)
+        self.report({'INFO'}, "Created {} vertex groups".format(created))
         
         return {"FINISHED"}
     
@@ -348,8 +382,18 @@ class GnoNodePanel(bpy.types.Panel):
     
     
     @classmethod
-    def poll(self, context):
-        return context.area.ui_type == "ShaderNodeTree" and context.active_object.active_material.node_tree.nodes.active.type == "TEX_IMAGE"
+    def poll(cls, context):
+        # runs on every redraw, so check the cheapest thing first and bail out on anything missing
+        if context.area.ui_type != "ShaderNodeTree":
+            return False
+        obj = context.active_object
+        if obj is None:
+            return False
+        material = obj.active_material
+        if material is None or material.node_tree is None:
+            return False
+        node = material.node_tree.nodes.active
+        return node is not None and node.type == "TEX_IMAGE"
 
     def draw(self,context):
         layout = self.layout
@@ -364,28 +408,26 @@ class MaterialProperties(bpy.types.Panel):
     bl_idname = "MATERIAL_PT_gno"
     bl_label = "GNO Material Properties"
 
+    # (label, property) pairs drawn as one row each
+    toggles = (
+        ("Disable backface culling", "disable_backface_culling"),
+        ("Always on top", "always_on_top"),
+        ("Fullbright", "fullbright"),
+    )
+
     @classmethod
     def poll(cls, context):
         return context.active_object.type == 'MESH' and context.active_object.active_material is not None
 
     def draw(self, context):
-        layout = self.layout
         properties = context.active_object.active_material.gnoSettings
+        layout_row = self.layout.row
 
-        row = layout.row()
-        row.alignment = "LEFT"
-        row.label(text="Disable backface culling")
-        row.prop(properties, "disable_backface_culling", text="")
-
-        row = layout.row()
-        row.alignment = "LEFT"
-        row.label(text="Always on top")
-        row.prop(properties, "always_on_top", text="")
-
-        row = layout.row()
-        row.alignment = "LEFT"
-        row.label(text="Fullbright")
-        row.prop(properties, "fullbright", text="")
+        for label, attribute in self.toggles:
+            row = layout_row()
+            row.alignment = "LEFT"
+            row.label(text=label)
+            row.prop(properties, attribute, text="")
 
 class MeshProperties(bpy.types.Panel):
     bl_space_type = "PROPERTIES"
@@ -406,16 +448,16 @@ class MeshProperties(bpy.types.Panel):
 
         layout.operator("vertex_groups.gno")
 
-        row = layout.row()
-        row.alignment = "LEFT"
-        row.label(text="Use custom bone visibility")
-        row.prop(properties, "use_custom_bone_visibility", text="")
-
-        row = layout.row()
-        row.alignment = "LEFT"
-        row.label(text="Custom bone visibility")
-        row.prop(properties, "bone_visibility", text="")
-        row.enabled = properties.use_custom_bone_visibility
+        use_custom_bone_visibility = properties.use_custom_bone_visibility
+        for label, attribute, enabled in (
+            ("Use custom bone visibility", "use_custom_bone_visibility", True),
+            ("Custom bone visibility", "bone_visibility", use_custom_bone_visibility),
+        ):
+            row = layout.row()
+            row.alignment = "LEFT"
+            row.label(text=label)
+            row.prop(properties, attribute, text="")
+            row.enabled = enabled
 
         box = layout.box()
         box.alignment = "LEFT"
@@ -433,27 +475,29 @@ class MeshProperties(bpy.types.Panel):
 def menu_export_func(self, context):
     self.layout.operator(ExportGNO.bl_idname, text="Sonic Riders GNO Model (.gno)")
 
+# property groups first, so they exist before anything that points to them
 classes = (
-    ExportGNO,
     GnoMaterialSettings,
-    MaterialProperties,
-    GnoNodePanel,
-    GnoTextureSettings,
-    GnoVertexGroups,
-    MeshProperties,
     GnoMeshSettings,
+    GnoTextureSettings,
     GnoVertexGroupSettings,
+    ExportGNO,
+    GnoVertexGroups,
     RenameCurrentVertexGroups,
     RenameAllVertexGroups,
     RenameCurrentAddLeadingZeroes,
     RenameAllAddLeadingZeroes,
     RenameCurrentRemoveLeadingZeroes,
-    RenameAllRemoveLeadingZeroes
+    RenameAllRemoveLeadingZeroes,
+    GnoNodePanel,
+    MaterialProperties,
+    MeshProperties,
 )
 
+register_classes, unregister_classes = bpy.utils.register_classes_factory(classes)
+
 def register():
-    for cls in classes:
-        bpy.utils.register_class(cls)
+    register_classes()
 
     bpy.types.TOPBAR_MT_file_export.append(menu_export_func)
     bpy.types.Material.gnoSettings = bpy.props.PointerProperty(type=GnoMaterialSettings)
@@ -464,8 +508,7 @@ def register():
 def unregister():
     bpy.types.TOPBAR_MT_file_export.remove(menu_export_func)
     
-    for cls in classes:
-        bpy.utils.unregister_class(cls)
+    unregister_classes() # unregisters in reverse order
     
 if __name__ == "__main__":
     register()
\ No newline at end of file
@@ -1,73 +1,58 @@
 import bpy
 import mathutils
 import numpy as np
-import itertools
 import os
 import struct
 from . import nn_model as nnModel
 from . import nn_general as nnGeneral
-import pathlib
 
-class Vector:
-    position: tuple
-
-    def __init__(self, position:tuple):
-        self.position = position[:3]
-
-    def write(self, file:nnModel.File):
-        for p in self.position:
-            file.write_float(p)
-
-def calculate_bounding_box(o:bpy.types.Mesh):
+UINT_LE = struct.Struct('<I')
+UINT_BE = struct.Struct('>I')
+VERTEX_ATTRIBUTE_STRUCT = struct.Struct('>2h') # attribute type and count, followed by its offset
+VERTEX_SET_STRUCT_SIZE = 0x38 # vertices, normals, (unused), UVs, (unused), weights, (unused)
+CHUNK_INFO_STRUCT = struct.Struct('>I4x')
+TEXTURE_ENTRY_STRUCT = struct.Struct('>4x2I8x') # texture name offset and flags
+MESH_SET_INFO_STRUCT = struct.Struct('>3I8x') # flags, mesh count, meshes offset
+DUMMY_NGOB_HEADER = struct.pack('>4s12x', bytes('NGOB', 'ascii'))
+MESH_STRUCT = struct.Struct('>4f5I') # bounds position and scale, bone, bone group, material, vertex set, face
+WEIGHTED_MESH_STRUCT = struct.Struct('>4fIi3I') # same but with a signed bone group
+DEFAULT_CHARACTER_ORIENTATION = struct.pack('>3f', 0, 1, 0) # straight up
+FACE_INFO_STRUCT = struct.Struct('>4I') # flags, face data offset, size, padding
+FACE_INFO_POINTER_STRUCT = struct.Struct('>2I')
+SPLINE_FILE_HEADER = struct.pack('>2B2s4x', 0x1, 0x2, bytes('GC', 'ascii'))
+SPLINE_INFO_STRUCT = struct.Struct('>12x4fH18x') # offsets (written later), bounding box position and scale, vertex count
+
+def calculate_bounding_box(o:bpy.types.Mesh, coordinates = None):
     """Calculates the bounding box center and scale of a single mesh"""
-    local_bbox_center = 0.125 * sum((mathutils.Vector(b) for b in o.bound_box), mathutils.Vector())
-
-    cx = local_bbox_center[0]
-    cy = local_bbox_center[1]
-    cz = local_bbox_center[2]
+    if coordinates is None:
+        coordinates = nnModel.get_vertex_coordinates(o.data)
 
-    distance = 0
-    for v in o.data.vertices:
-        tDist = mathutils.Vector((cx - v.co.x,  cy - v.co.y, cz - v.co.z)).length
-        if tDist > distance:
-            distance = tDist
+    local_bbox_center = mathutils.Vector(np.asarray(o.bound_box).mean(axis=0))
+    distance = nnModel.get_max_distance(coordinates, local_bbox_center)
 
     return local_bbox_center, distance
 
-def calculate_all_meshes_bounding_box():
+def calculate_all_meshes_bounding_box(mesh_objects = None, mesh_coordinates = None):
     """Calculates the bounding box center and scale of all meshes"""
+    if mesh_objects is None:
+        mesh_objects = [o for o in bpy.context.scene.objects if o.type == "MESH"]
+    if mesh_coordinates is None:
+        mesh_coordinates = {o.name: nnModel.get_vertex_coordinates(o.data) for o in mesh_objects}
+
     # get the local coordinates of all object bounding box corners    
-    coords = np.vstack(
-        tuple(np.array(o.bound_box)
-            for o in  
-                bpy.context.scene.objects
-                if o.type == 'MESH'
-                )
-            )
-            
+    coords = np.vstack(tuple(np.array(o.bound_box) for o in mesh_objects))
 
     # bottom front left (all the mins)
     bfl = coords.min(axis=0)
     # top back right
     tbr = coords.max(axis=0)
-    G  = np.array((bfl, tbr)).T
-    # bound box coords ie the 8 combinations of bfl tbr.
-    bbc = [i for i in itertools.product(*G)]
-
-    local_bbox = sum((mathutils.Vector(b) for b in bbc), mathutils.Vector()) / 8
-    cx = local_bbox[0]
-    cy = local_bbox[1]
-    cz = local_bbox[2]
-
-    allobj = [o for o in bpy.context.scene.objects if o.type == "MESH"]
-
-    distance = 0
-    for o in allobj:
-        for v in o.data.vertices:
-            tDist = mathutils.Vector((cx - v.co.x,  cy - v.co.y, cz - v.co.z)).length
-            if tDist > distance:
-                distance = tDist
-                
+    # the average of all 8 corners is just the midpoint
+    local_bbox = mathutils.Vector((bfl + tbr) * 0.5)
+
+    # one pass over every mesh's vertices at once
+    all_coordinates = np.concatenate([mesh_coordinates[o.name] for o in mesh_objects])
+    distance = nnModel.get_max_distance(all_coordinates, local_bbox)
+
     return local_bbox, distance
 
 def read_original_model(file: nnModel.File, raw_bone_data: bool):
@@ -75,25 +60,21 @@ def read_original_model(file: nnModel.File, raw_bone_data: bool):
     if raw_bone_data:
         original_bone_data = file.read()
     else:
+        # read the whole model once and walk its headers in memory
         start_offset = 0x20
-        file.seek(0x8)
-        NGOB_header_index = file.read_int()
-        file.seek(0)
-        file.change_endianness('<')
+        data = file.read()
+        NGOB_header_index = UINT_BE.unpack_from(data, 0x8)[0]
+
+        # skip every chunk before the object data, chunk sizes are little endian
+        offset = 0
         for _ in range(NGOB_header_index):
-            file.fileobject.seek(4, 1)
-            file.fileobject.seek(file.read_int(), 1)
-        file.change_endianness('>')
+            offset += 0x8 + UINT_LE.unpack_from(data, offset + 0x4)[0]
 
-        file.fileobject.seek(8, 1)
-        object_data_offset = file.read_int()
-        file.seek(object_data_offset + start_offset)
-        file.fileobject.seek(0x28, 1)
-        bone_count = file.read_int()
-        file.fileobject.seek(4, 1)
-        file.seek(file.read_int() + start_offset)
+        object_data_offset = UINT_BE.unpack_from(data, offset + 0x8)[0] + start_offset
+        bone_count = UINT_BE.unpack_from(data, object_data_offset + 0x28)[0]
+        bone_offset = UINT_BE.unpack_from(data, object_data_offset + 0x30)[0] + start_offset
 
-        original_bone_data = file.read(bone_count * 0x80)
+        original_bone_data = data[bone_offset:bone_offset + bone_count * 0x80]
 
     return original_bone_data
 
@@ -101,54 +82,42 @@ def write_new_gno_file(output_file: nnModel.File, **keywords):
     """Main function for exporting a model file"""
     def write_vertex_struct(file:nnModel.File, info:nnModel.VertexSetInfo, gno:nnModel.GNO):
         """Writes the struct that contains the info of a vertex set to file"""
-        format = '>2h'
-        if info.vertices_offset:
-            file.write(struct.pack(format, 0x1, info.vertices_count))
-            file.write_int_NOF0(info.vertices_offset, gno)
-        else:
-            file.write(struct.pack('8x'))
-        
-        if info.normals_offset:
-            file.write(struct.pack(format, 0x3, info.normals_count))
-            file.write_int_NOF0(info.normals_offset, gno)
-        else:
-            file.write(struct.pack('8x'))
-
-        file.write(struct.pack('8x'))
-
-        if info.uvs_offset:
-            file.write(struct.pack(format, 0x2, info.uvs_count))
-            file.write_int_NOF0(info.uvs_offset, gno)
-        else:
-            file.write(struct.pack('8x'))
-        
-        file.write(struct.pack('8x'))
-
-        if info.weights_offset:
-            file.write(struct.pack(format, 0x1, info.weights_count))
-            file.write_int_NOF0(info.weights_offset, gno)
-        else:
-            file.write(struct.pack('8x'))
-
-        file.write(struct.pack('8x'))
-
-    def get_mesh_data(ob:bpy.types.Object, armature, vertex_set, face_index, rigtype, is_weighted = False):
+        # 7 slots of 8 bytes, the empty ones (and the ones that are always empty) stay zeroed
+        struct_data = bytearray(VERTEX_SET_STRUCT_SIZE)
+        struct_offset = file.tell()
+        attributes = (
+            (0, 0x1, info.vertices_count, info.vertices_offset),
+            (1, 0x3, info.normals_count, info.normals_offset),
+            (3, 0x2, info.uvs_count, info.uvs_offset),
+            (5, 0x1, info.weights_count, info.weights_offset),
+        )
+        for slot, attribute_type, count, offset in attributes:
+            if offset:
+                VERTEX_ATTRIBUTE_STRUCT.pack_into(struct_data, slot * 8, attribute_type, count)
+                UINT_BE.pack_into(struct_data, slot * 8 + 4, offset)
+                gno.NOF0_offsets.append(struct_offset + slot * 8 + 4)
+
+        file.write(struct_data)
+
+    def get_mesh_data(ob:bpy.types.Object, armature, bone_dict, vertex_set, face_index, rigtype, is_weighted = False):
         """Gets all the necessary data of a mesh"""
         
         if rigtype == "board_only" or rigtype == "no_rig":
             bone_group = 0
+        elif is_weighted:
+            bone_group = -1 # weight painted meshes don't get a bone group, so there's no bone to look up
         else:
-            bone_index, bone_name = nnModel.get_mesh_bone(ob)
-            bone_group = nnModel.get_bone_group(ob, bone_name, is_weighted)
+            _, bone_name = nnModel.get_mesh_bone(ob, bone_lookups)
+            bone_group = nnModel.get_bone_group(ob, bone_name, is_weighted, bone_lookups)
         
         if ob.data.gnoSettings.use_custom_bone_visibility:
             bone_visibility = ob.data.gnoSettings.bone_visibility
 
         elif rigtype == "character":
-            bone_visibility = nnModel.get_bone_visibility_character(armature, bone_group)
+            bone_visibility = nnModel.get_bone_visibility_character(armature, bone_group, bone_dict)
 
         elif rigtype == "character_eggman" or rigtype == "general":
-            bone_visibility = nnModel.get_bone_visibility_general(armature, bone_group)
+            bone_visibility = nnModel.get_bone_visibility_general(armature, bone_group, bone_dict)
 
         elif rigtype == "board_only":
             bone_visibility = 2
@@ -158,62 +127,62 @@ def write_new_gno_file(output_file: nnModel.File, **keywords):
             bone_visibility = 0
 
         firstmat = nnModel.get_mesh_material(ob)
-        mat_index = nnModel.get_material_index(materials, firstmat)
-        bounds_position, bounds_scale = calculate_bounding_box(ob)
+        mat_index = nnModel.get_material_index(material_indices, firstmat)
+        bounds_position, bounds_scale = calculate_bounding_box(ob, mesh_coordinates[ob.name])
         bounds = nnModel.Bounds(bounds_position, bounds_scale)
 
         mesh = nnModel.Mesh(ob, bounds, bone_visibility, bone_group, mat_index, vertex_set, face_index)
         return mesh
 
-    def calculate_NGTL_header_size(current_size, texture_names):
+    def calculate_NGTL_header_size(current_size, texture_name_bytes):
         """Calculates the texture list header size"""
-        string_table_size = 0
-        for name in texture_names:
-            string_table_size += len(name) + 1 # +1 for string eliminator byte
+        string_table_size = sum(len(name) for name in texture_name_bytes)
         
         final_size = current_size + string_table_size + 0x8
         return (final_size + 31) & 0xFFFFFFE0 # align 32 bit
     
-    def write_NGTL(file:nnModel.File, texture_names, texture_name_offsets, gno:nnModel.GNO):
+    def write_NGTL(file:nnModel.File, texture_name_bytes, texture_name_offsets, gno:nnModel.GNO):
         """Formats and writes the texture list to file"""
-        for offset in texture_name_offsets:
-            file.write(struct.pack('>4x'))
-            file.write_int_NOF0(offset, gno)
-            file.write(struct.pack('>I8x', 0x00050001))
+        # every entry in one write, the NOF0 offsets point at each entry's name offset
+        entries_offset = file.tell()
+        file.write(b''.join(TEXTURE_ENTRY_STRUCT.pack(offset, 0x00050001) for offset in texture_name_offsets))
+        gno.NOF0_offsets.extend(entries_offset + i * TEXTURE_ENTRY_STRUCT.size + 0x4 for i in range(len(texture_name_offsets)))
         
-        file.write_int(len(texture_names))
+        file.write_int(len(texture_name_bytes))
         file.write_int_NOF0(0x10, gno)
 
-        for name in texture_names:
-            file.write(struct.pack('>' + str(len(name) + 1) + 's', bytes(name, 'ascii')))
+        file.write(b''.join(texture_name_bytes))
 
-        file.write_32bit_aligned()
+        file.write_32byte_aligned()
 
     def generate_dummy_NGOB_header():
         """Generates a "padding" object header, it is updated after the fact"""
-        return struct.pack('>4s12x', bytes('NGOB', 'ascii'))
+        return DUMMY_NGOB_HEADER
 
     def write_NOF0_header(file:nnModel.File, gno:nnModel.GNO):
         """Writes out every offset in the offset list to file"""
-        file.write_32bit_aligned()
+        file.write_32byte_aligned()
         offset_count = len(gno.NOF0_offsets)
         start_offset = file.tell() + 0x10
         estimated_size = start_offset + len(gno.NOF0_offsets) * 4
         estimated_size = (estimated_size + 0x1F) & 0xFFFFFFE0 # 32 bit align
         final_size = estimated_size - start_offset + 0x8
-        header = struct.pack('<4sI', bytes('NOF0', 'ascii'), final_size)
-        header += struct.pack('>I4x', offset_count)
+        header = nnGeneral.CHUNK_HEADER_STRUCT.pack(bytes('NOF0', 'ascii'), final_size)
+        header += CHUNK_INFO_STRUCT.pack(offset_count)
 
         file.write(header)
-        for offset in gno.NOF0_offsets:
-            file.write_int(offset)
+        file.write(np.frombuffer(gno.NOF0_offsets, dtype=np.uint32).astype('>u4').tobytes()) # one byte swap for the whole table
         
     # instantiate main class
     gno = nnModel.GNO()
 
     to_write_rig = False if keywords["rig_type"] == "no_rig" or keywords["rig_type"] == "board_only" else True
 
+    # the scene's meshes, only looked up once
+    mesh_objects = [o for o in bpy.context.scene.objects if o.type == 'MESH']
+
     weighted_mesh_names = nnModel.get_weight_painted_meshes()
+    weighted_mesh_name_set = frozenset(weighted_mesh_names) # for lookups, the list keeps the order
 
     # use a different rig if needed
     if keywords["original_model_bool"] and to_write_rig:
@@ -224,20 +193,18 @@ def write_new_gno_file(output_file: nnModel.File, **keywords):
     armature = None
 
     # categorize all meshes
-    for m in bpy.context.scene.objects:
-        if not m.type == 'MESH':
-            continue
-
+    for m in mesh_objects:
         if not armature:
             armature = m.find_armature()
 
-        nnModel.triangulateMesh(m.data)
+        data = m.data
+        nnModel.triangulateMesh(data)
         is_weight_painted = False
 
-        if not m.data.uv_layers: # no UVs
+        if not data.uv_layers: # no UVs
             gno.vertex_set_2_meshes.append(m)
         else:
-            if m.name in weighted_mesh_names:
+            if m.name in weighted_mesh_name_set:
                 is_weight_painted = True
             
             if is_weight_painted:
@@ -245,6 +212,9 @@ def write_new_gno_file(output_file: nnModel.File, **keywords):
             else:
                 gno.vertex_set_1_meshes.append(m)
 
+    # every mesh's vertices, fetched once (after triangulating) for writing and for the bounds
+    mesh_coordinates = {m.name: nnModel.get_vertex_coordinates(m.data) for m in mesh_objects}
+
     gno.vertex_set_1_uv_count = [0] * len(gno.vertex_set_1_meshes)
     gno.vertex_set_3_uv_count = [0] * len(gno.vertex_set_3_meshes)
 
@@ -259,6 +229,7 @@ def write_new_gno_file(output_file: nnModel.File, **keywords):
 
     global materials
     materials, texture_names = nnModel.get_all_materials()
+    material_indices = nnModel.get_material_indices(materials)
     texture_count = len(texture_names)
 
     print()
@@ -266,20 +237,23 @@ def write_new_gno_file(output_file: nnModel.File, **keywords):
     for i, tname in enumerate(texture_names):
         print("{}. {}".format(i, tname))
 
+    # encoded once, with the string terminator byte, for both the offsets and the string table
+    texture_name_bytes = [bytes(name, 'ascii') + b'\x00' for name in texture_names]
+
     offset_to_texture_count_and_offsets = texture_count * 0x14 + 0x10
-    header_size = calculate_NGTL_header_size(offset_to_texture_count_and_offsets, texture_names)
-    header = struct.pack('<4sI', bytes('NGTL', 'ascii'), header_size - 0x8)
-    header += struct.pack('>I4x', offset_to_texture_count_and_offsets)
+    header_size = calculate_NGTL_header_size(offset_to_texture_count_and_offsets, texture_name_bytes)
+    header = nnGeneral.CHUNK_HEADER_STRUCT.pack(bytes('NGTL', 'ascii'), header_size - 0x8)
+    header += CHUNK_INFO_STRUCT.pack(offset_to_texture_count_and_offsets)
 
     string_table_offset = offset_to_texture_count_and_offsets + 0x8
     string_table_offsets = []
-    for name in texture_names:
+    for name in texture_name_bytes:
         string_table_offsets.append(string_table_offset)
-        string_table_offset += len(name) + 1 # string eliminator byte
+        string_table_offset += len(name)
     
     if keywords["include_texture_list"]:
         output_file.write(header)
-        write_NGTL(output_file, texture_names, string_table_offsets, gno)
+        write_NGTL(output_file, texture_name_bytes, string_table_offsets, gno)
 
     NGOB_header_offset = output_file.tell()
     output_file.write(generate_dummy_NGOB_header())
@@ -298,122 +272,61 @@ def write_new_gno_file(output_file: nnModel.File, **keywords):
     nnModel.write_materials(output_file, materials, gno)
 
     # write out all of the vertex sets' data
-    if gno.vertex_set_1_meshes:
-        vertexset1_vertex_count = 0
-        vertexset1_normal_count = 0
-        vertexset1_uv_count = 0
-
-        vertex_set_with_uvs_normals_offset = output_file.tell()
-        for m in gno.vertex_set_1_meshes:
-            vertexset1_vertex_count += nnModel.write_vertices(output_file, m.data)
-        output_file.write_8bit_aligned()
-
-        normal_set_with_uvs_normals_offset = output_file.tell()
-        vertexset1_normal_indices = []
-        for m in gno.vertex_set_1_meshes:
-            normals, normal_indices = nnModel.getNormalData(m.data)
-            vertexset1_normal_indices.append(normal_indices)
-            vertexset1_normal_count += nnModel.write_normals(output_file, normals)
-        output_file.write_8bit_aligned()
-
-        uv_set_with_uvs_normals_offset = output_file.tell()
-        for uv_i, m in enumerate(gno.vertex_set_1_meshes):
-            all_uvs, uv_indices, uv_count = nnModel.get_mesh_uvs_with_indices(m.data)
-            gno.vertex_set_1_uv_indices.append(uv_indices)
-            vertexset1_uv_count += nnModel.write_uvs(output_file, all_uvs)
-        output_file.write_8bit_aligned()
-        
-    if gno.vertex_set_2_meshes:
-        vertexset2_vertex_count = 0
-        vertexset2_normal_count = 0
-
-        vertex_set_with_normals_offset = output_file.tell()
-        for m in gno.vertex_set_2_meshes:
-            vertexset2_vertex_count += nnModel.write_vertices(output_file, m.data)
-        output_file.write_8bit_aligned()
-
-        normal_set_with_normals_offset = output_file.tell()
-        vertexset2_normal_indices = []
-        for m in gno.vertex_set_2_meshes:
-            normals, normal_indices = nnModel.getNormalData(m.data)
-            vertexset2_normal_indices.append(normal_indices)
-            vertexset2_normal_count += nnModel.write_normals(output_file, normals)
-        output_file.write_8bit_aligned()
-
-    if gno.vertex_set_3_meshes:
-        vertexset3_vertex_count = 0
-        vertexset3_normal_count = 0
-        vertexset3_uv_count = 0
-
-        vertex_set_with_uvs_normals_weights_offset = output_file.tell()
-        for m in gno.vertex_set_3_meshes:
-            vertexset3_vertex_count += nnModel.write_vertices(output_file, m.data)
-        output_file.write_8bit_aligned()
-        
-        normal_set_with_uvs_normals_weights_offset = output_file.tell()
-        for m in gno.vertex_set_3_meshes:
-            normals = nnModel.getNormalData_weightpaint(m.data)
-            vertexset3_normal_count += nnModel.write_normals(output_file, normals)
-        output_file.write_8bit_aligned()
-        
-        uv_set_with_uvs_normals_weights_offset = output_file.tell()
-        for uv_i, m in enumerate(gno.vertex_set_3_meshes):
-            all_uvs, uv_indices, uv_count = nnModel.get_mesh_uvs_with_indices(m.data)
-            gno.vertex_set_3_uv_indices.append(uv_indices)
-            vertexset3_uv_count += nnModel.write_uvs(output_file, all_uvs)
-        output_file.write_8bit_aligned()
-        
-        weighted_bones_vertices_offset = output_file.tell()
-        vertexset3_weight_count = vertexset3_vertex_count
-        nnModel.write_vertex_weights(output_file, weighted_vertices_weights, weighted_vertices_bones)
-
-    # write out all of the vertex sets' info structs
-    if gno.vertex_set_1_meshes:
-        vertex_set_1_offset = output_file.tell()
+    # (meshes, where to store their UV indices, has UVs, is weight painted), in file order
+    vertex_sets = [
+        (gno.vertex_set_1_meshes, gno.vertex_set_1_uv_indices, True, False),
+        (gno.vertex_set_2_meshes, None, False, False),
+        (gno.vertex_set_3_meshes, gno.vertex_set_3_uv_indices, True, True),
+    ]
+
+    vertex_set_infos = []
+    for meshes, uv_indices, has_uvs, is_weighted in vertex_sets:
+        if not meshes:
+            continue
 
-        vertexset1_info = nnModel.VertexSetInfo( \
-        vertex_set_1_offset, \
-        vertex_set_with_uvs_normals_offset, vertexset1_vertex_count, \
-        normal_set_with_uvs_normals_offset, vertexset1_normal_count, \
-        uv_set_with_uvs_normals_offset, vertexset1_uv_count)
+        # go through each mesh once for everything the set needs, then write it out block by block
+        all_coordinates, all_normals, all_uvs = [], [], []
+        for m in meshes:
+            all_coordinates.append(mesh_coordinates[m.name])
+            if is_weighted:
+                normals = nnModel.getNormalData_weightpaint(m.data)
+            else:
+                normals = nnModel.getNormalData(m.data)[0]
+            all_normals.append(np.asarray(normals, dtype=np.float64).reshape(-1, 3))
+            if has_uvs:
+                mesh_uvs, mesh_uv_indices, _ = nnModel.get_mesh_uvs_with_indices(m.data)
+                uv_indices.append(mesh_uv_indices)
+                all_uvs.append(mesh_uvs)
 
-        write_vertex_struct(output_file, vertexset1_info, gno)
+        # the info offset is filled in once the info structs get written
+        info = nnModel.VertexSetInfo(0, output_file.tell(), nnModel.write_vertices(output_file, all_coordinates))
+        output_file.write_4byte_aligned()
 
-    if gno.vertex_set_2_meshes:
-        vertex_set_2_offset = output_file.tell()
+        info.normals_offset = output_file.tell()
+        info.normals_count = nnModel.write_normals(output_file, np.concatenate(all_normals))
+        output_file.write_4byte_aligned()
 
-        vertexset2_info = nnModel.VertexSetInfo( \
-        vertex_set_2_offset, \
-        vertex_set_with_normals_offset, vertexset2_vertex_count, \
-        normal_set_with_normals_offset, vertexset2_normal_count)
+        if has_uvs:
+            info.uvs_offset = output_file.tell()
+            info.uvs_count = nnModel.write_uvs(output_file, np.concatenate(all_uvs))
+            output_file.write_4byte_aligned()
 
-        write_vertex_struct(output_file, vertexset2_info, gno)
+        if is_weighted:
+            info.weights_offset = output_file.tell()
+            info.weights_count = info.vertices_count
+            nnModel.write_vertex_weights(output_file, weighted_vertices_weights, weighted_vertices_bones)
 
-    if gno.vertex_set_3_meshes:
-        vertex_set_3_offset = output_file.tell()
+        vertex_set_infos.append(info)
 
-        vertexset3_info = nnModel.VertexSetInfo( \
-        vertex_set_3_offset, \
-        vertex_set_with_uvs_normals_weights_offset, vertexset3_vertex_count, \
-        normal_set_with_uvs_normals_weights_offset, vertexset3_normal_count, \
-        uv_set_with_uvs_normals_weights_offset, vertexset3_uv_count, \
-        weighted_bones_vertices_offset, vertexset3_weight_count)
-
-        write_vertex_struct(output_file, vertexset3_info, gno)
+    # write out all of the vertex sets' info structs
+    for info in vertex_set_infos:
+        info.info_offset = output_file.tell()
+        write_vertex_struct(output_file, info, gno)
 
     offset_to_vertex_sets_offset = output_file.tell()
-
-    if gno.vertex_set_1_meshes:
+    for info in vertex_set_infos:
         output_file.write_int(0x1)
-        output_file.write_int_NOF0(vertexset1_info.info_offset, gno)
-
-    if gno.vertex_set_2_meshes:
-        output_file.write_int(0x1)
-        output_file.write_int_NOF0(vertexset2_info.info_offset, gno)
-
-    if gno.vertex_set_3_meshes:
-        output_file.write_int(0x1)
-        output_file.write_int_NOF0(vertexset3_info.info_offset, gno)
+        output_file.write_int_NOF0(info.info_offset, gno)
 
 
     # write out the face data of all the meshes
@@ -433,67 +346,53 @@ def write_new_gno_file(output_file: nnModel.File, **keywords):
         facedata_list.append(vertexset3_faceoffsets)
 
     # write out face data info structs
-    face_info_struct_offsets = []
-    for data in facedata_list:
-        for face in data:
-            face_info_struct_offsets.append(output_file.tell())
-            output_file.write_int(face.flags)
-            output_file.write_int_NOF0(face.offset, gno)
-            output_file.write_int(face.size)
-            output_file.write_int(0)
+    # every struct is 0x10 bytes, so keep track of the offset instead of asking the file each time
+    face_info_struct_start = output_file.tell()
+    faces = [face for data in facedata_list for face in data]
+    face_info_struct_offsets = [face_info_struct_start + i * FACE_INFO_STRUCT.size for i in range(len(faces))]
+    output_file.write(b''.join(FACE_INFO_STRUCT.pack(face.flags, face.offset, face.size, 0) for face in faces))
+    gno.NOF0_offsets.extend(offset + 0x4 for offset in face_info_struct_offsets) # face data offset
     
-    face_info_offset = output_file.tell()
-    for offset in face_info_struct_offsets:
-        output_file.write_int(0x4)
-        output_file.write_int_NOF0(offset, gno)
+    face_info_offset = face_info_struct_start + len(faces) * FACE_INFO_STRUCT.size
+    output_file.write(b''.join(FACE_INFO_POINTER_STRUCT.pack(0x4, offset) for offset in face_info_struct_offsets))
+    gno.NOF0_offsets.extend(face_info_offset + i * FACE_INFO_POINTER_STRUCT.size + 0x4 for i in range(len(faces)))
 
     meshset_info = []
     faceindex = 0
     vertex_index = 0
 
+    # the bone group -> bone lookup is the same for every mesh, so only build it once
+    if armature and keywords['rig_type'] in ("character", "character_eggman", "general"):
+        bone_dict = nnModel.get_bone_group_to_bone_dict(armature)
+    else:
+        bone_dict = None
+    bone_lookups = {} # bone and bone group indices per armature, filled in by the first mesh that needs them
+
     # write out all the mesh set data
     if gno.vertex_set_1_meshes:
         v1_meshes_start = output_file.tell()
         for me in gno.vertex_set_1_meshes:
-            mesh_data = get_mesh_data(me, armature, vertex_index, faceindex, keywords['rig_type'])
-            for f in mesh_data.bounds.position:
-                output_file.write_float(f)
-            output_file.write_float(mesh_data.bounds.scale)
-            output_file.write_int(mesh_data.bone)
-            output_file.write_int(mesh_data.bone_group)
-            output_file.write_int(mesh_data.material)
-            output_file.write_int(mesh_data.vertex_set)
-            output_file.write_int(mesh_data.face)
+            mesh_data = get_mesh_data(me, armature, bone_dict, vertex_index, faceindex, keywords['rig_type'])
+            output_file.write(MESH_STRUCT.pack(*mesh_data.bounds.position, mesh_data.bounds.scale, \
+                mesh_data.bone, mesh_data.bone_group, mesh_data.material, mesh_data.vertex_set, mesh_data.face))
             faceindex += 1
         vertex_index += 1
 
     if gno.vertex_set_2_meshes:
         v2_meshes_start = output_file.tell()
         for me in gno.vertex_set_2_meshes:
-            mesh_data = get_mesh_data(me, armature, vertex_index, faceindex, keywords['rig_type'])
-            for f in mesh_data.bounds.position:
-                output_file.write_float(f)
-            output_file.write_float(mesh_data.bounds.scale)
-            output_file.write_int(mesh_data.bone)
-            output_file.write_int(mesh_data.bone_group)
-            output_file.write_int(mesh_data.material)
-            output_file.write_int(mesh_data.vertex_set)
-            output_file.write_int(mesh_data.face)
+            mesh_data = get_mesh_data(me, armature, bone_dict, vertex_index, faceindex, keywords['rig_type'])
+            output_file.write(MESH_STRUCT.pack(*mesh_data.bounds.position, mesh_data.bounds.scale, \
+                mesh_data.bone, mesh_data.bone_group, mesh_data.material, mesh_data.vertex_set, mesh_data.face))
             faceindex += 1
         vertex_index += 1
 
     if gno.vertex_set_3_meshes:
         v3_meshes_start = output_file.tell()
         for me in gno.vertex_set_3_meshes:
-            mesh_data = get_mesh_data(me, armature, vertex_index, faceindex, keywords['rig_type'], True)
-            for f in mesh_data.bounds.position:
-                output_file.write_float(f)
-            output_file.write_float(mesh_data.bounds.scale)
-            output_file.write_int(mesh_data.bone)
-            output_file.write_signed_int(mesh_data.bone_group)
-            output_file.write_int(mesh_data.material)
-            output_file.write_int(mesh_data.vertex_set)
-            output_file.write_int(mesh_data.face)
+            mesh_data = get_mesh_data(me, armature, bone_dict, vertex_index, faceindex, keywords['rig_type'], True)
+            output_file.write(WEIGHTED_MESH_STRUCT.pack(*mesh_data.bounds.position, mesh_data.bounds.scale, \
+                mesh_data.bone, mesh_data.bone_group, mesh_data.material, mesh_data.vertex_set, mesh_data.face))
             faceindex += 1
         vertex_index += 1
 
@@ -510,16 +409,13 @@ def write_new_gno_file(output_file: nnModel.File, **keywords):
 
 
     mesh_set_info_offset = output_file.tell()
-    for info in meshset_info:
-        output_file.write_int(info.flags)
-        output_file.write_int(info.count)
-        output_file.write_int_NOF0(info.start_offset, gno)
-        output_file.write(struct.pack('8x'))
+    output_file.write(b''.join(MESH_SET_INFO_STRUCT.pack(info.flags, info.count, info.start_offset) for info in meshset_info))
+    gno.NOF0_offsets.extend(mesh_set_info_offset + i * MESH_SET_INFO_STRUCT.size + 0x8 for i in range(len(meshset_info)))
 
     # write out all of the object data infos
     main_object_data_offset = output_file.tell()
 
-    model_bounds_center, model_bounds_distance = calculate_all_meshes_bounding_box()
+    model_bounds_center, model_bounds_distance = calculate_all_meshes_bounding_box(mesh_objects, mesh_coordinates)
     model_bounds = nnModel.Bounds(model_bounds_center, model_bounds_distance)
     for f in model_bounds.position:
         output_file.write_float(f)
@@ -560,7 +456,7 @@ def write_new_gno_file(output_file: nnModel.File, **keywords):
 
     output_file.write_int(0x4)
 
-    output_file.write_32bit_aligned()
+    output_file.write_32byte_aligned()
     offset_to_NOF0 = output_file.tell()
     write_NOF0_header(output_file, gno)
     nnModel.write_NFN0_header(output_file)
@@ -574,7 +470,7 @@ def write_new_gno_file(output_file: nnModel.File, **keywords):
 
 def write_new_spline_file(file:nnModel.File):
     """Main function for exporting a splines file"""
-    default_length = [0.130168]
+    default_length = 0.130168
     spline_count = 0
     spline_data = {}
     for m in bpy.context.selected_objects:
@@ -582,32 +478,23 @@ def write_new_spline_file(file:nnModel.File):
             continue
         spline_info = {}
         spline_info["vertex_count"] = len(m.data.vertices)
-        spline_info["vertices"] = [v.co for v in m.data.vertices]
-        spline_info["character_orientations"] = [Vector((0, 1, 0)) for _ in range(len(m.data.vertices))] # default
-        spline_info["bounding_box_position"], spline_info["bounding_box_scale"] = calculate_bounding_box(m)
+        spline_info["vertices"] = vertices = nnModel.get_vertex_coordinates(m.data)
+        spline_info["bounding_box_position"], spline_info["bounding_box_scale"] = calculate_bounding_box(m, vertices)
         
-        hitbox = []
-        vertex_range = range(len(m.data.vertices))
-        for vindex in vertex_range:
-            if vindex == vertex_range[-1]:
-                break
-            curr_hitbox = []
-            vertex = spline_info["vertices"][vindex]
-            next_vertex = spline_info["vertices"][vindex+1]
-            curr_hitbox.append(vertex)
-            curr_hitbox.append(next_vertex)
-            curr_hitbox.append(default_length)
-            hitbox.append(curr_hitbox)
+        # one hitbox between each pair of consecutive vertices: start, end, length
+        hitbox = np.empty((max(len(vertices) - 1, 0), 7), dtype=np.float32)
+        hitbox[:, 0:3] = vertices[:-1]
+        hitbox[:, 3:6] = vertices[1:]
+        hitbox[:, 6] = default_length
         
         spline_info["hitbox"] = hitbox
         spline_data[spline_count] = spline_info
         spline_count += 1
 
     
-    header = struct.pack('>2B2s4x', 0x1, 0x2, bytes('GC', 'ascii'))
-    file.write(header)
+    file.write(SPLINE_FILE_HEADER)
     file.write_int(spline_count)
-    file.write(struct.pack('>{}x'.format(4*spline_count))) # will write the offsets later
+    file.write(bytes(4*spline_count)) # will write the offsets later
 
     spline_info_offsets = {}
     spline_data_offsets = {}
@@ -617,30 +504,20 @@ def write_new_spline_file(file:nnModel.File):
         spline_info = spline_data[key]
         data_offsets = [] # in order of struct
 
-        file.write(struct.pack('>12x')) # will write the offsets later
-        for p in spline_info["bounding_box_position"]:
-            file.write_float(p)
-        
-        file.write_float(spline_info["bounding_box_scale"])
-        file.write_short(spline_info["vertex_count"])
-        file.write(struct.pack('>18x'))
+        # the offsets at the start will be written later
+        file.write(SPLINE_INFO_STRUCT.pack(*spline_info["bounding_box_position"], spline_info["bounding_box_scale"], \
+        spline_info["vertex_count"]))
 
         data_offsets.append(file.tell()) # hitbox
-        for hbox in spline_info["hitbox"]:
-            for data in hbox:
-                for p in data:
-                    file.write_float(p)
+        file.write(spline_info["hitbox"].astype('>f4').tobytes())
 
         data_offsets.append(file.tell()) # vertices
-        for vert in spline_info["vertices"]:
-            for p in vert:
-                file.write_float(p)
+        file.write(spline_info["vertices"].astype('>f4').tobytes())
 
         data_offsets.append(file.tell()) # character orientation
-        for orientation in spline_info["character_orientations"]:
-            orientation.write(file)
+        file.write(DEFAULT_CHARACTER_ORIENTATION * spline_info["vertex_count"])
 
         spline_data_offsets[key] = data_offsets
 
-    file.write_32bit_aligned()
+    file.write_32byte_aligned()
     return spline_info_offsets, spline_data_offsets
\ No newline at end of file
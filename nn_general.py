@@ -1,10 +1,14 @@
 import struct, bpy
 
+CHUNK_HEADER_STRUCT = struct.Struct('<4sI') # chunk headers are always little endian
+NGIF_INFO_STRUCT = struct.Struct('>6I')
+
 def generate_NGIF_header(offset_to_NOF0, NGOB_header_index):
     """Generates NN's info header"""
-    data = struct.pack('>6I', NGOB_header_index, 0x20, offset_to_NOF0-0x20, offset_to_NOF0, 0x1C0, 0x1)
-    header = struct.pack('<4sI', bytes('NGIF', 'ascii'), len(data))
-    return struct.pack('>' + str(len(header)) + 's' + str(len(data)) + 's', header, data)
+    header = bytearray(0x20)
+    CHUNK_HEADER_STRUCT.pack_into(header, 0, bytes('NGIF', 'ascii'), len(header) - 0x8)
+    NGIF_INFO_STRUCT.pack_into(header, 0x8, NGOB_header_index, 0x20, offset_to_NOF0-0x20, offset_to_NOF0, 0x1C0, 0x1)
+    return header
 
 def message_box(message = "", title = "Message Box", icon = 'INFO'):
 
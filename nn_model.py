@@ -1,28 +1,42 @@
 from dataclasses import dataclass
+import array
 import struct
+import io
 import bpy
-import mathutils, itertools
+import bmesh
+import mathutils
 import numpy as np
 import os
 
-@dataclass
+FILE_BUFFER_SIZE = 1 << 20 # lets the many small writes coalesce into a few large ones
+
+# precompiled formats for the structs that get packed over and over
+MATERIAL_STRUCT = struct.Struct('>I12f10I') # main body of a material
+MATERIAL_TEXTURE_STRUCT = struct.Struct('>4If')
+MATERIAL_INFO_STRUCT = struct.Struct('>2HI') # texture bits, 0xFFFF, then the material's offset
+BONE_STRUCT = struct.Struct('>I4h3f3i3f12f3ff4x3f') # 0x80 bytes per bone
+
+# what every mesh's face data starts with, the vertex set with only normals has its own
+FACE_DATA_START = b'\x08\x50\x00\x00\x1E\x00\x08\x60\x00\x00\x00\x03\x10\x00\x00\x10\x08\x00\x00\x00'
+FACE_DATA_START_NORMALS = b'\x08\x50\x00\x00\x1E\x00\x08\x60\x00\x00\x00\x00\x10\x00\x00\x10\x08\x00\x00\x00'
+FACE_FLAGS_NORMALS_UVS = b'\x14' # flags for faces with normals and UVs
+FACE_FLAGS_NORMALS = b'\x04' # flags for only normals
+STRIP_HEADER_DTYPE = np.dtype([('command', 'u1'), ('count', 'u2')]) # triangle strip command, then its vertex count
+NFN0_HEADER_STRUCT = struct.Struct('<4sI8x')
+NEND_HEADER = struct.pack('<4sI', bytes('NEND', 'ascii'), 0x8)
+
+@dataclass(slots=True)
 class Bounds:
     position: tuple
     scale: float
 
-@dataclass
-class Face:
-    vertex: list
-    normal: list
-    texcoord: list
-
-@dataclass
+@dataclass(slots=True)
 class ObjInfo:
     vertex_count: int
     uv_count: int
     normal_count: int
 
-@dataclass
+@dataclass(slots=True)
 class VertexSetInfo:
     info_offset: int
     vertices_offset: int
@@ -34,7 +48,7 @@ class VertexSetInfo:
     weights_offset: int = 0
     weights_count: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class Mesh:
     blender_object: bpy.types.Object # will have data in here
     bounds: Bounds
@@ -44,7 +58,7 @@ class Mesh:
     vertex_set: int
     face: int
 
-@dataclass
+@dataclass(slots=True)
 class Material:
     blender_object: bpy.types.Material
     name: str
@@ -54,26 +68,34 @@ class Material:
     texture_ids: list[int]
     texture_flags: list[str]
 
-@dataclass
+@dataclass(slots=True)
 class MeshSetInfo:
     start_offset: int
     flags: int
     count: int
 
-@dataclass
+@dataclass(slots=True)
 class FaceData:
     flags: int
     offset: int
     length: int
 
-@dataclass
+@dataclass(slots=True)
 class FaceInfo:
-    flags = 0x4
+    flags: int
     offset: int
+    size: int
+
+@dataclass(slots=True)
+class IndexInfo:
+    # info on how much indices need to be incremented
+    vertex_increment: int
+    normal_increment: int
+    texcoord_increment: int
 
 class GNO:
     """Main class that will hold all the necessary info for the file"""
-    NOF0_offsets: list # offset table
+    NOF0_offsets: array.array # offset table, kept as unsigned 32-bit ints instead of Python int objects
 
     all_meshes: list 
 
@@ -94,7 +116,7 @@ class GNO:
     vertex_set_3_flags = 0x201 # set that has vertices, normals, UVs and weight painted vertices
 
     def __init__(self):
-        self.NOF0_offsets = []
+        self.NOF0_offsets = array.array('I')
         self.all_meshes = []
 
         self.vertex_set_1 = None
@@ -129,21 +151,23 @@ class MeshData:
 
 class File:
     """Main file handling class"""
-    def __init__(self, filepath, read_or_write, endianness = '>'):
+    def __init__(self, filepath, read_or_write, endianness = '>', in_memory = False):
         self.filepath = filepath
         self.read_or_write = read_or_write
         self.endian = endianness
+        self.in_memory = in_memory
         self.set_formats()
 
     def __enter__(self):
-        self.fileobject = open(self.filepath, self.read_or_write)
+        if self.in_memory:
+            # nothing touches the disk, the caller takes the buffer and writes it out itself
+            self.fileobject = io.BytesIO()
+        else:
+            self.fileobject = open(self.filepath, self.read_or_write, buffering=FILE_BUFFER_SIZE)
         return self
 
     def __exit__(self, exception_type, exception_value, traceback):
         self.fileobject.close()
-    
-    def __del__(self):
-        self.fileobject.close()
 
     def change_endianness(self, endianness):
         """Since the model format has a mix of both endians, this can be used"""
@@ -153,6 +177,10 @@ class File:
     def get_filename(self):
         """Used for NFN0 header"""
         return os.path.basename(self.filepath)
+
+    def getbuffer(self):
+        """Returns a writable view of the contents of an in-memory file"""
+        return self.fileobject.getbuffer()
     
     def set_formats(self):
         self.sb_format = self.endian + 'b'
@@ -163,6 +191,15 @@ class File:
         self.h_format = self.endian + 'H'
         self.i_format = self.endian + 'I'
 
+        # compiled once per endianness so the read/write functions don't have to parse the format every call
+        self.sb_struct = struct.Struct(self.sb_format)
+        self.sh_struct = struct.Struct(self.sh_format)
+        self.si_struct = struct.Struct(self.si_format)
+        self.f_struct = struct.Struct(self.f_format)
+        self.b_struct = struct.Struct(self.b_format)
+        self.h_struct = struct.Struct(self.h_format)
+        self.i_struct = struct.Struct(self.i_format)
+
     def tell(self):
         return self.fileobject.tell()
 
@@ -176,7 +213,7 @@ class File:
         Reads bytes from the file, either from current position or from a specified offset.
         """
 
-        if offset:
+        if offset is not None: # offset 0 is a valid offset too
             original_pos = self.tell()
             self.seek(offset)
             output = self.fileobject.read(size)
@@ -190,25 +227,25 @@ class File:
         return output
 
     def read_signed_byte(self):
-        return struct.unpack(self.sb_format, self.fileobject.read(1))[0]
+        return self.sb_struct.unpack(self.fileobject.read(1))[0]
 
     def read_signed_short(self):
-        return struct.unpack(self.sh_format, self.fileobject.read(2))[0]
+        return self.sh_struct.unpack(self.fileobject.read(2))[0]
 
     def read_signed_int(self):
-        return struct.unpack(self.si_format, self.fileobject.read(4))[0]
+        return self.si_struct.unpack(self.fileobject.read(4))[0]
 
     def read_byte(self):
-        return struct.unpack(self.b_format, self.fileobject.read(1))[0]
+        return self.b_struct.unpack(self.fileobject.read(1))[0]
 
     def read_short(self):
-        return struct.unpack(self.h_format, self.fileobject.read(2))[0]
+        return self.h_struct.unpack(self.fileobject.read(2))[0]
 
     def read_int(self):
-        return struct.unpack(self.i_format, self.fileobject.read(4))[0]
+        return self.i_struct.unpack(self.fileobject.read(4))[0]
     
     def read_float(self):
-        return struct.unpack(self.f_format, self.fileobject.read(4))[0]
+        return self.f_struct.unpack(self.fileobject.read(4))[0]
 
 
 
@@ -219,7 +256,7 @@ class File:
         Writes bytes to the file, either starting from current position or from a specified offset.
         """
 
-        if offset:
+        if offset is not None: # offset 0 is a valid offset too
             original_pos = self.fileobject.tell()
             self.fileobject.seek(offset)
             self.fileobject.write(bytes)
@@ -228,22 +265,22 @@ class File:
             self.fileobject.write(bytes)
 
     def write_signed_byte(self, b):
-        self.fileobject.write(struct.pack(self.sb_format, b))
+        self.fileobject.write(self.sb_struct.pack(b))
     
     def write_signed_short(self, h):
-        self.fileobject.write(struct.pack(self.sh_format, h))
+        self.fileobject.write(self.sh_struct.pack(h))
     
     def write_signed_int(self, i):
-        self.fileobject.write(struct.pack(self.si_format, i))
+        self.fileobject.write(self.si_struct.pack(i))
     
     def write_byte(self, b):
-        self.fileobject.write(struct.pack(self.b_format, b))
+        self.fileobject.write(self.b_struct.pack(b))
     
     def write_short(self, h):
-        self.fileobject.write(struct.pack(self.h_format, h))
+        self.fileobject.write(self.h_struct.pack(h))
     
     def write_int(self, i):
-        self.fileobject.write(struct.pack(self.i_format, i))
+        self.fileobject.write(self.i_struct.pack(i))
 
     def write_int_NOF0(self, i, gno: GNO):
         """
@@ -251,46 +288,59 @@ class File:
         """
 
         gno.NOF0_offsets.append(self.tell())
-        self.fileobject.write(struct.pack(self.i_format, i))
+        self.fileobject.write(self.i_struct.pack(i))
         
     def write_float(self, f):
-        self.fileobject.write(struct.pack(self.f_format, f))
+        self.fileobject.write(self.f_struct.pack(f))
 
     def write_short_list(self, l):
         self.fileobject.write(struct.pack('{}{}H'.format(self.endian, len(l)), *l))
 
-    def write_8bit_aligned(self):
+    def write_aligned(self, alignment):
         """
-        Writes padding up until the current address is at a 8-bit alignment.
+        Writes padding up until the current address is a multiple of alignment (which has to be a power of 2).
         """
 
-        while self.tell() & 0x3:
-            self.fileobject.write(b'\x00')
+        padding = -self.tell() & (alignment - 1)
+        if padding:
+            self.fileobject.write(bytes(padding))
 
-    def write_32bit_aligned(self):
+    def write_4byte_aligned(self):
         """
-        Writes padding up until the current address is at a 32-bit alignment.
+        Writes padding up until the current address is at a 4-byte alignment.
         """
 
-        while self.tell() & 0x1F:
-            self.fileobject.write(b'\x00')
+        self.write_aligned(0x4)
+
+    def write_32byte_aligned(self):
+        """
+        Writes padding up until the current address is at a 32-byte alignment.
+        """
 
-def divide_chunks(l, n):
-    # looping till length l
-    for i in range(0, len(l), n): 
-        yield l[i:i + n]
+        self.write_aligned(0x20)
 
 def float_to_bam(f: float) -> int:
     return int(round(f * (32767 / 180)))
 
 def write_materials(file:File, materials:list[Material], gno:GNO):
     """Formats and writes a list of materials to the file"""
-    format_string = '>I12f10I' # for the main body of the material
-    texture_format_string = '>4If'
     global material_offsets
+    global material_structs_offset
     material_offsets = []
 
+    # lay everything out first, the material structs that point at the materials come right after them
+    start_offset = file.tell()
+    offset = start_offset
     for mat in materials:
+        material_offsets.append(offset)
+        offset += MATERIAL_STRUCT.size
+        if mat.texture_count > 0:
+            offset += len(mat.texture_ids) * MATERIAL_TEXTURE_STRUCT.size
+    material_structs_offset = offset
+
+    # then fill in one buffer for all of it
+    material_data = bytearray(material_structs_offset - start_offset + len(materials) * MATERIAL_INFO_STRUCT.size)
+    for mat, material_offset in zip(materials, material_offsets):
         matflags = 0
         if mat.blender_object.gnoSettings.disable_backface_culling:
             matflags |= 2
@@ -298,12 +348,16 @@ def write_materials(file:File, materials:list[Material], gno:GNO):
             matflags |= 0x10000
         if not mat.blender_object.gnoSettings.fullbright:
             matflags |= 0x1000000
-        material_data = struct.pack(format_string, matflags, mat.color[0], mat.color[1], mat.color[2], \
+        position = material_offset - start_offset
+        MATERIAL_STRUCT.pack_into(material_data, position, matflags, mat.color[0], mat.color[1], mat.color[2], \
         mat.alpha, mat.color[0], mat.color[1], mat.color[2], 0.9, 0.9, 0.9, 2.0, 0.299999982118607, \
         0x1, 0x4, 0x5, 0x5, 0x2, 0x0, 0x6, 0x7, 0x0, 0x0)
+        position += MATERIAL_STRUCT.size
 
         if mat.texture_count > 0:
-            texture_data_list = []
+            # textures without a flag go first, the last one of those first of all
+            plain_textures = []
+            flagged_textures = []
             for i, texture_id in enumerate(mat.texture_ids):
                 flags = 0x400C0101
                 if mat.texture_flags[i] == 'reflective':
@@ -312,240 +366,193 @@ def write_materials(file:File, materials:list[Material], gno:GNO):
                     flags = 0x400C0104
 
                 if mat.texture_flags[i] == 'none':
-                    texture_data_list.insert(0, struct.pack(texture_format_string, flags, texture_id, \
-                    0x80000000, 0x0, 1.0))
+                    plain_textures.append((flags, texture_id))
                 else:
-                    texture_data_list.append(struct.pack(texture_format_string, flags, texture_id, \
-                    0x80000000, 0x0, 1.0))
-
-            for data in texture_data_list:
-                material_data += data
-
-        material_offsets.append(file.tell())
-        file.write(material_data)
-    
-    global material_structs_offset
-    material_structs_offset = file.tell()
-    for i, mat in enumerate(materials):
-        texture_count_int = 1
-        for count in range(mat.texture_count):
-            texture_count_int += 1 << count + 1
-        file.write(struct.pack('>2H', texture_count_int, 0xFFFF))
-        file.write_int_NOF0(material_offsets[i], gno)
-
-    file.write_8bit_aligned()
-
-def write_vertices(file:File, mesh:bpy.types.Mesh):
-    """Formats and writes a vertex set's vertices to the file"""
-    for v in mesh.vertices:
-        for p in v.co:
-            file.write_float(p)
+                    flagged_textures.append((flags, texture_id))
+
+            for flags, texture_id in plain_textures[::-1] + flagged_textures:
+                MATERIAL_TEXTURE_STRUCT.pack_into(material_data, position, flags, texture_id, 0x80000000, 0x0, 1.0)
+                position += MATERIAL_TEXTURE_STRUCT.size
+
+    position = material_structs_offset - start_offset
+    for mat, material_offset in zip(materials, material_offsets):
+        texture_count_int = (2 << mat.texture_count) - 1 # the lowest texture_count + 1 bits set
+        MATERIAL_INFO_STRUCT.pack_into(material_data, position, texture_count_int, 0xFFFF, material_offset)
+        position += MATERIAL_INFO_STRUCT.size
+
+    # the material offsets sit 4 bytes into each 8 byte struct
+    gno.NOF0_offsets.extend(range(material_structs_offset + 4, material_structs_offset + len(materials) * MATERIAL_INFO_STRUCT.size, 8))
+    file.write(material_data)
+
+    file.write_4byte_aligned()
+
+def get_vertex_coordinates(mesh:bpy.types.Mesh) -> np.ndarray:
+    """Gets the coordinates of all of a mesh's vertices as a (vertex count, 3) array"""
+    coordinates = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coordinates)
+    return coordinates.reshape(-1, 3)
+
+def get_loop_vertex_indices(mesh:bpy.types.Mesh) -> np.ndarray:
+    """Gets the vertex index of every loop of a mesh, in polygon order"""
+    vertex_indices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", vertex_indices)
+    return vertex_indices.astype(np.int64)
+
+def get_max_distance(coordinates:np.ndarray, center) -> float:
+    """Gets the distance from center to the furthest of the given (n, 3) coordinates"""
+    if not len(coordinates):
+        return 0
+    # subtract straight into a float64 array, then fuse the square-sum so there's only one temporary
+    offsets = np.subtract(coordinates, np.asarray(center, dtype=np.float64), dtype=np.float64)
+    return float(np.sqrt(np.einsum('ij,ij->i', offsets, offsets).max()))
+
+def write_vertices(file:File, mesh_coordinates:list):
+    """Formats and writes a vertex set's vertices (one coordinate array per mesh) to the file"""
+    coordinates = np.concatenate(mesh_coordinates)
+    file.write(coordinates.astype(file.endian + 'f4').tobytes())
     
-    return len(mesh.vertices)
+    return len(coordinates)
 
 def write_normals(file:File, normals:list):
     """Formats and writes a vertex set's normals to the file"""
-    for n in normals:
-        for p in n:
-            point = int(round(p * 64))
-            file.write_signed_byte(point)
+    # clip so a bad normal saturates instead of wrapping around when cast to int8
+    points = np.rint(np.asarray(normals, dtype=np.float64) * 64).clip(-128, 127).astype(np.int8)
+    file.write(points.tobytes())
 
     return len(normals)
 
 def write_uvs(file:File, uvs:list):
     """Formats and writes a vertex set's UVs to the file"""
-    for uv in uvs:
-        u = round(uv[0] * 256)
-        v = round(-(uv[1] - 1) * 256)
-        file.write_signed_short(u)
-        file.write_signed_short(v)
+    uv_array = np.asarray(uvs, dtype=np.float64).reshape(-1, 2)
+    scaled = np.empty(uv_array.shape, dtype=np.float64)
+    scaled[:, 0] = np.rint(uv_array[:, 0] * 256)
+    scaled[:, 1] = np.rint(-(uv_array[:, 1] - 1) * 256)
+    if len(scaled) and (scaled.min() < -0x8000 or scaled.max() > 0x7FFF):
+        raise Exception("UV coordinates out of range (must be between -128 and 128)")
+    file.write(scaled.astype(file.endian + 'i2').tobytes()) # one batch cast and byte swap to the file's endianness
     
     return len(uvs)
 
 def write_vertex_weights(file:File, weights:list, bones:list):
     """Formats and writes a vertex set's vertex weights to the file"""
-    for w, b in zip(weights, bones):
-        weight = int(round(w * 16384))
-        for bone in b:
-            file.write_byte(bone)
-        file.write_signed_short(weight)
-
-    file.write_8bit_aligned()
-
-def write_mesh_faces(file:File, flags:int, meshes:list, meshes_uv_indices = False, weightpaint_normals = False):
-    """Converts a list of meshes' faces into triangle strips (it's very unoptimized tho) and writes the data to the file"""
-    @dataclass
-    class FaceInfo:
-        flags: int
-        offset: int
-        size: int
-
-    @dataclass
-    class IndexInfo:
-        # info on how much indices need to be incremented
-        vertex_increment: int
-        normal_increment: int
-        texcoord_increment: int
+    # every record is both bone groups then the weight, so fill the columns and write it all out at once
+    bone_array = np.asarray(bones, dtype=np.int64).reshape(-1, 2)
+    weight_array = np.rint(np.asarray(weights, dtype=np.float64) * 16384)
+    if len(bone_array) and (bone_array.min() < 0 or bone_array.max() > 0xFF):
+        raise Exception("bone group index out of range (must be between 0 and 255)")
+    if len(weight_array) and (weight_array.min() < -0x8000 or weight_array.max() > 0x7FFF):
+        raise Exception("vertex weight out of range")
 
-    def swap_f1_f2(face):
-        face.vertex[1], face.normal[1], \
-        face.vertex[0], face.normal[0] = \
-        face.vertex[0], face.normal[0], \
-        face.vertex[1], face.normal[1] # f2, f1, f3
+    records = np.empty(len(weights), dtype=[('bones', 'u1', 2), ('weight', file.endian + 'i2')])
+    records['bones'] = bone_array
+    records['weight'] = weight_array
+    file.write(records.tobytes())
 
-        if face.texcoord:
-            face.texcoord[1], face.texcoord[0] = face.texcoord[0], face.texcoord[1]
+    file.write_4byte_aligned()
 
-    def strip_faces(faces):
-
-        last_face = faces[0]
-        doesUVexist = False
-        if last_face.texcoord:
-            doesUVexist = True
-        swap_f1_f2(last_face)
-
-        face_sets = []
-        current_face_set = []
-        xor_bool = 0
-
-        current_face_set.append(last_face)
-
-        for x in range(len(faces)-1):
-            current_face = faces[x+1]
-
-            if xor_bool & 1:
-                swap_f1_f2(current_face)
-            
-            if doesUVexist:
-                if current_face.vertex[0] == last_face.vertex[1] and current_face.vertex[1] == last_face.vertex[2] \
-                    and current_face.texcoord[0] == last_face.texcoord[1] and current_face.texcoord[1] == last_face.texcoord[2]:
-                        current_face_set.append(current_face)
-                else:
-                    face_sets.append(current_face_set)
-                    current_face_set = []
-                    if not xor_bool & 1:
-                        swap_f1_f2(current_face)
-                    current_face_set.append(current_face)
-                    xor_bool = 1 # this will get XORed to 0
-            else:
-                if current_face.vertex[0] == last_face.vertex[1] and current_face.vertex[1] == last_face.vertex[2]:
-                    current_face_set.append(current_face)
-                else:
-                    face_sets.append(current_face_set)
-                    current_face_set = []
-                    if not xor_bool & 1:
-                        swap_f1_f2(current_face)
-                    current_face_set.append(current_face)
-                    xor_bool = 1 # this will get XORed to 0
-                
-            last_face = current_face
-            xor_bool ^= 1
-
-        if current_face_set:
-            face_sets.append(current_face_set)
-        
-        return face_sets
-
-    def create_faces(vertices, normals=None, uvs=None, weightpaint_normals=False):
-        div_verts = list(divide_chunks(vertices, 3))
-        if normals:
-            div_normals = list(divide_chunks(normals, 3))
-        div_uvs = [[0, 0, 0]] * len(div_verts)
-        if uvs:
-            div_uvs = list(divide_chunks(uvs, 3))
-        all_faces = []
-
-        if weightpaint_normals:
-            for vert, uv in zip(div_verts, div_uvs):
-                if uvs:
-                    all_faces.append(Face(vert, vert, uv))
-                else:
-                    all_faces.append(Face(vert, vert, []))
-            return all_faces
-
-        for vert, norm, uv in zip(div_verts, div_normals, div_uvs):
-            if len(vert) < 3:
-                continue
-            if uvs:
-                all_faces.append(Face(vert, norm, uv))
-            else:
-                all_faces.append(Face(vert, norm, []))
-
-        return all_faces
-
-    def write_face(file:File, face:Face):
-        file.write_short(face.vertex[0])
-        file.write_short(face.normal[0])
-        if face.texcoord:
-            file.write_short(face.texcoord[0])
-
-        file.write_short(face.vertex[1])
-        file.write_short(face.normal[1])
-        if face.texcoord:
-            file.write_short(face.texcoord[1])
-
-        file.write_short(face.vertex[2])
-        file.write_short(face.normal[2])
-        if face.texcoord:
-            file.write_short(face.texcoord[2])
-
-    def write_face_partial(file:File, face:Face):
-        file.write_short(face.vertex[2])
-        file.write_short(face.normal[2])
-        if face.texcoord:
-            file.write_short(face.texcoord[2])
+def write_mesh_faces(file:File, flags:int, meshes:list, meshes_uv_indices = False, weightpaint_normals = False):
+    """Converts a list of meshes' faces into triangle strips (reusing the strips of identical meshes) and writes the data to the file"""
+    def strip_faces(corners):
+        """
+        Splits faces up into triangle strips. corners is a (face count, 3 corners, index count) array of each
+        corner's vertex, normal (and texcoord) index, the first two corners of every other face get swapped in
+        place so they keep their winding. Returns where each strip starts
+        """
+        face_count = len(corners)
+        # normals don't matter for whether faces connect, only vertices (and texcoords)
+        compared = corners[:, :, [0] + list(range(2, corners.shape[2]))]
+        last_corners = compared[:-1]
+        next_corners = compared[1:]
+
+        # a face continues a strip if it starts with the last two corners of the face before it, but which corners
+        # that compares depends on if either face ends up swapped, so work out both cases for every face at once
+        continues_swapped = np.all((next_corners[:, 1] == last_corners[:, 1]) & (next_corners[:, 0] == last_corners[:, 2]), axis=1)
+        continues_unswapped = np.all((next_corners[:, 0] == last_corners[:, 0]) & (next_corners[:, 1] == last_corners[:, 2]), axis=1)
+
+        # the first face of a strip is always swapped, after that every other one is. a face lands on an odd position
+        # (unswapped) only if the face before it was on an even one and it continues unswapped, so it's unswapped
+        # exactly when it ends an odd length run of faces that continue unswapped. that can be counted all at once
+        face_numbers = np.arange(1, face_count)
+        last_not_continuing = np.maximum.accumulate(np.where(continues_unswapped, 0, face_numbers))
+        unswapped = ((face_numbers - last_not_continuing) & 1).astype(bool)
+
+        # a new strip starts wherever the check for the face's position fails
+        previous_unswapped = np.concatenate(([False], unswapped[:-1]))
+        strip_breaks = np.where(previous_unswapped, ~continues_swapped, ~continues_unswapped)
+        strip_starts = [0] + (np.flatnonzero(strip_breaks) + 1).tolist()
+
+        swapped_faces = np.flatnonzero(np.concatenate(([True], ~unswapped)))
+        corners[swapped_faces, :2] = corners[swapped_faces, 1::-1]
+
+        return strip_starts
 
     info = IndexInfo(0, 0, 0)
-    face_data_start = b'\x08\x50\x00\x00\x1E\x00\x08\x60\x00\x00\x00\x03\x10\x00\x00\x10\x08\x00\x00\x00'
-    if flags == 0x0009000A:
-        face_data_start = b'\x08\x50\x00\x00\x1E\x00\x08\x60\x00\x00\x00\x00\x10\x00\x00\x10\x08\x00\x00\x00'
+    face_data_start = FACE_DATA_START_NORMALS if flags == 0x0009000A else FACE_DATA_START
+    face_flags = FACE_FLAGS_NORMALS_UVS if meshes_uv_indices else FACE_FLAGS_NORMALS
     face_infos = []
+    strip_cache = {}
 
     for i, mesh in enumerate(meshes):
         faceinfo = FaceInfo(flags, 0, 0)
         me = mesh.data
 
-        face_indices = []
-        for poly in me.polygons:
-            for v in poly.vertices:
-                vert = v + info.vertex_increment
-                face_indices.append(vert)
-
-        current_normal_indices = list(range(0+info.normal_increment, len(me.loops)+info.normal_increment))
+        # the mesh is triangulated, so going through the loops is going through every triangle's corners
+        face_indices = get_loop_vertex_indices(me)
 
+        # every corner of every triangle gets its vertex, normal and (if there are any) texcoord index
+        # the indices are made relative to the mesh first, the strips don't change when they're all shifted by the same amount
+        face_count = len(face_indices) // 3
+        vertex_indices = face_indices[:face_count * 3]
+        if weightpaint_normals:
+            normal_indices = vertex_indices
+            increments = [info.vertex_increment, info.vertex_increment]
+        else:
+            normal_indices = np.arange(face_count * 3, dtype=np.int64)
+            increments = [info.vertex_increment, info.normal_increment]
+        index_lists = [vertex_indices, normal_indices]
         if meshes_uv_indices:
-            all_faces = create_faces(face_indices, current_normal_indices, meshes_uv_indices[i], weightpaint_normals)
+            index_lists.append(np.asarray(meshes_uv_indices[i][:face_count * 3], dtype=np.int64))
+            increments.append(info.texcoord_increment)
+        corners = np.stack(index_lists, axis=1).reshape(face_count, 3, len(index_lists))
+
+        # meshes with the exact same faces (like linked duplicates) only get stripped once
+        cache_key = corners.tobytes()
+        if cache_key in strip_cache:
+            corners, strip_starts = strip_cache[cache_key]
         else:
-            all_faces = create_faces(face_indices, current_normal_indices, weightpaint_normals=weightpaint_normals)
+            strip_starts = strip_faces(corners) if face_count else []
+            strip_cache[cache_key] = corners, strip_starts
+        corners = corners + np.asarray(increments, dtype=np.int64) # new array, the cached one stays relative
+        if face_count and corners.max() > 0xFFFF:
+            raise Exception("vertex set has too many indices for 16-bit faces (mesh {})".format(mesh.name))
 
-        face_sets = strip_faces(all_faces)
-        
-
-        file.write_32bit_aligned()
+        file.write_32byte_aligned()
         offset = file.tell()
         faceinfo.offset = offset
 
-        file.write(face_data_start)
-        if meshes_uv_indices:
-            file.write(b'\x14') # flags for faces with normals and UVs
-        else:
-            file.write(b'\x04') # flags for only normals
-
-        for set in face_sets:
-            file.write(b'\x99')
-            file.write_short(len(set) + 2)
-
-            for face in set:
-                if face.texcoord:
-                    for t in range(len(face.texcoord)):
-                        face.texcoord[t] = face.texcoord[t] + info.texcoord_increment
-
-            first_face = set[0]
-            write_face(file, first_face)
-
-            for x in range(len(set)-1):
-                current_face = set[x+1]
-                write_face_partial(file, current_face)
+        # the corners that get written are every corner of a strip's first face, then only the last corner of the rest.
+        # they're picked out for the whole mesh at once, in order, and cast straight to the file's 16-bit format
+        written_corners = np.zeros((face_count, 3), dtype=bool)
+        written_corners[:, 2] = True
+        written_corners[strip_starts, :2] = True
+        index_data = corners[written_corners].astype(file.endian + 'u2').view(np.uint8).ravel()
+
+        # then the strip headers get slotted in between, every strip is a header followed by its corners' indices
+        strip_vertex_counts = np.diff(strip_starts + [face_count]) + 2
+        strip_sizes = STRIP_HEADER_DTYPE.itemsize + strip_vertex_counts * corners.shape[2] * 2 # 2 bytes per index
+        header_offsets = np.cumsum(strip_sizes) - strip_sizes
+        strip_headers = np.empty(len(strip_starts), dtype=STRIP_HEADER_DTYPE.newbyteorder(file.endian))
+        strip_headers['command'] = 0x99
+        strip_headers['count'] = strip_vertex_counts
+
+        strip_data = np.empty(int(strip_sizes.sum()), dtype=np.uint8)
+        is_header = np.zeros(len(strip_data), dtype=bool)
+        for header_byte in range(STRIP_HEADER_DTYPE.itemsize):
+            is_header[header_offsets + header_byte] = True
+        strip_data[is_header] = strip_headers.view(np.uint8)
+        strip_data[~is_header] = index_data
+
+        file.write(face_data_start + face_flags + strip_data.tobytes())
 
         info.vertex_increment += len(me.vertices)
         if weightpaint_normals:
@@ -556,8 +563,7 @@ def write_mesh_faces(file:File, flags:int, meshes:list, meshes_uv_indices = Fals
             uvcount = max(meshes_uv_indices[i]) + 1
             info.texcoord_increment += uvcount
 
-        
-        file.write_32bit_aligned()
+        file.write_32byte_aligned()
         size = file.tell() - offset
         faceinfo.size = size
 
@@ -571,6 +577,13 @@ def triangulateMesh(mesh: bpy.types.Mesh):
 
     # Thank you to Justin113D on GitHub for this triangulate function!
 
+    # nothing to do if it's all triangles already (like mesh data shared between objects, or a re-export),
+    # this checks the mesh as it is now so edits since the last export still get triangulated
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    if np.all(loop_totals == 3):
+        return
+
     # if we use custom normals, we gotta correct them
     # manually, since blenders triangulate is shit
     if mesh.use_auto_smooth:
@@ -595,7 +608,6 @@ def triangulateMesh(mesh: bpy.types.Mesh):
         # free the split data
         # mesh.free_normals_split()
 
-    import bmesh
     bm = bmesh.new()
     bm.from_mesh(mesh)
     bmesh.ops.triangulate(bm,
@@ -606,9 +618,9 @@ def triangulateMesh(mesh: bpy.types.Mesh):
     bm.free()
 
     if mesh.use_auto_smooth:
-        polygons = list()
-        for p in mesh.polygons:
-            polygons.append(p)
+        # the loops' vertex indices all in one go instead of going through mesh.loops for every check
+        loopVertexIndices = get_loop_vertex_indices(mesh).tolist()
+        polygons = [tuple(p.loop_indices) for p in mesh.polygons]
 
         splitNormals = [None] * len(mesh.loops)
 
@@ -616,92 +628,81 @@ def triangulateMesh(mesh: bpy.types.Mesh):
             foundTris = 0
             toFind = len(nd[0])-2
 
-            out = False
-            toRemove = list()
+            # where each vertex is in the original polygon, reversed so the first one wins like list.index
+            origPos = {vi: k for k, vi in reversed(list(enumerate(nd[0])))}
+            toRemove = set()
 
             for p in polygons:
                 found = 0
-                for l in p.loop_indices:
-                    if mesh.loops[l].vertex_index in nd[0]:
+                for l in p:
+                    if loopVertexIndices[l] in origPos:
                         found += 1
 
                 if found == 3:
                     foundTris += 1
 
-                    for l in p.loop_indices:
-                        splitNormals[l] \
-                            = nd[1][nd[0].index(mesh.loops[l].vertex_index)]
+                    for l in p:
+                        splitNormals[l] = nd[1][origPos[loopVertexIndices[l]]]
 
-                    toRemove.append(p)
+                    toRemove.add(p)
                     if foundTris == toFind:
                         break
 
-            for p in toRemove:
-                polygons.remove(p)
+            if toRemove:
+                polygons = [p for p in polygons if p not in toRemove]
 
         if len(polygons) > 0:
             print("\ntriangulating went wrong?", len(polygons))
         else:
             mesh.normals_split_custom_set(splitNormals)
 
+def get_vertex_normals(mesh: bpy.types.Mesh) -> np.ndarray:
+    """Gets the normals of all of a mesh's vertices as a (vertex count, 3) array"""
+    normals = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("normal", normals)
+    return normals.reshape(-1, 3)
+
 def getNormalData_weightpaint(mesh: bpy.types.Mesh) -> list():
     """Gets the normals of a weight painted mesh"""
-    normals = list()
+    normals = get_vertex_normals(mesh)
     if mesh.use_auto_smooth:
+        # average the split normals of every loop a vertex is used in, in one pass over the loops
         mesh.calc_normals_split()
-        for v in mesh.vertices:
-            normal = mathutils.Vector((0, 0, 0))
-            normalCount = 0
-            for l in mesh.loops:
-                if l.vertex_index == v.index:
-                    normal += l.normal
-                    normalCount += 1
-            if normalCount == 0:
-                normals.append(v.normal)
-            else:
-                normals.append(normal / normalCount)
-
+        loop_normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+        mesh.loops.foreach_get("normal", loop_normals)
         mesh.free_normals_split()
-    else:
-        for v in mesh.vertices:
-            normals.append(v.normal)
+
+        vertex_indices = get_loop_vertex_indices(mesh)
+        normal_sums = np.zeros_like(normals)
+        np.add.at(normal_sums, vertex_indices, loop_normals.reshape(-1, 3))
+        normal_counts = np.bincount(vertex_indices, minlength=len(normals))
+
+        # vertices that aren't part of any loop keep their own normal
+        used = normal_counts > 0
+        normals[used] = normal_sums[used] * (1 / normal_counts[used].astype(np.float32))[:, None]
     return normals
 
 def getNormalData(mesh: bpy.types.Mesh) -> list():
     """Gets the normals of a mesh that isn't weight painted"""
-    normals = list()
     normal_indices = list()
-    normal_index = 0
     if mesh.use_auto_smooth:
         mesh.calc_normals_split()
-        for l in mesh.loops:
-            normal = mathutils.Vector((0, 0, 0))
-            normal += l.normal
-            """
-            if normal in normals:
-                norm_index = normals.index(normal)
-                normal_indices.append(norm_index)
-            else:
-                normals.append(normal)
-                normal_indices.append(normal_index)
-                normal_index += 1
-            """
-            normals.append(normal)
+        normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+        mesh.loops.foreach_get("normal", normals)
+        normals = normals.reshape(-1, 3)
 
         mesh.free_normals_split()
     else:
-        for v in mesh.vertices:
-            normals.append(v.normal)
-            normal_indices.append(v.index)
+        normals = get_vertex_normals(mesh)
+        normal_indices = list(range(len(normals)))
     return normals, normal_indices
 
 def get_all_materials():
     """Gets all of the materials in the blend file with all of its properties"""
-    texture_id = 0
     untitled_texture_id = 0
 
     all_materials = []
-    texture_names = []
+    texture_name_ids = {} # texture name -> texture id, in the order they were found
     
     for material in bpy.data.materials:
         if material.node_tree:
@@ -712,7 +713,8 @@ def get_all_materials():
             texture_ids = []
 
             for node in material.node_tree.nodes:
-                if node.bl_idname == 'ShaderNodeTexImage':
+                node_type = node.bl_idname
+                if node_type == 'ShaderNodeTexImage':
                     texture_count += 1
                     if node.image:
                         texture_name = node.image.name.split('.')[:-1]
@@ -722,23 +724,20 @@ def get_all_materials():
                         texture_name = "untitled{}.gvr".format(untitled_texture_id)
                         untitled_texture_id += 1
 
-                    if texture_name in texture_names:
-                        tex_id = texture_names.index(texture_name)
-                        texture_ids.append(tex_id)
-                    else:
-                        texture_names.append(texture_name)
-                        texture_ids.append(texture_id)
-                        texture_id += 1
+                    tex_id = texture_name_ids.get(texture_name)
+                    if tex_id is None:
+                        tex_id = texture_name_ids[texture_name] = len(texture_name_ids)
+                    texture_ids.append(tex_id)
 
                     texture_flags = node.gnoSettings.texture_property
                     
                     texture_flag_list.append(texture_flags)
 
-                if node.bl_idname == 'ShaderNodeRGB':
+                elif node_type == 'ShaderNodeRGB':
                     rgb_outputs = node.outputs[0]
                     color = rgb_outputs.default_value
 
-                if node.bl_idname == 'ShaderNodeValue':
+                elif node_type == 'ShaderNodeValue':
                     alpha_outputs = node.outputs[0]
                     alpha = alpha_outputs.default_value
             
@@ -747,7 +746,7 @@ def get_all_materials():
             new_material = Material(material, material.name, color, alpha, texture_count, texture_ids, texture_flag_list)
             all_materials.append(new_material)
 
-    return all_materials, texture_names
+    return all_materials, list(texture_name_ids)
 
 def get_mesh_material(ob):
     """Gets the material of a mesh (currently will halt the export if no material is assigned)"""
@@ -762,20 +761,20 @@ def get_mesh_material(ob):
 
     return ob.data.materials[0]
 
-def get_material_index(all_mats, material) -> int:
-    """Gets the index of a material in a list of materials, so it can be assigned to a mesh"""
-    index_found = False
-    all_material_names = [x.name for x in all_mats]
-    material_name = material.name
-    for material_index in range(len(all_material_names)):
-        if all_material_names[material_index] == material_name:
-            index_found = True
-            break
+def get_material_indices(all_mats) -> dict:
+    """Maps every material name to its index in a list of materials, built once so meshes don't have to search the list"""
+    material_indices = {}
+    for material_index, mat in enumerate(all_mats):
+        material_indices.setdefault(mat.name, material_index) # first one wins, like the old linear search
+    return material_indices
 
-    if not index_found:
+def get_material_index(material_indices, material) -> int:
+    """Gets the index of a material from the dict made by get_material_indices, so it can be assigned to a mesh"""
+    material_name = material.name
+    if material_name not in material_indices:
         raise Exception("Material index calculation failed for {}. Does material not exist?".format(material_name))
-        
-    return material_index
+
+    return material_indices[material_name]
 
 def get_weight_painted_meshes():
     """Checks all meshes for if they are weight painted, if so, it will return the names of said meshes"""
@@ -808,23 +807,27 @@ def get_weight_paints(armature, mesh_names):
 
     bone_dict = get_bone_group_to_bone_dict(armature)
     bone_dict = {v: k for k, v in bone_dict.items()} # invert dict, now it's bone: bone group
-    all_bones = [bone.name for bone in armature.data.bones]
+    bone_indices, _ = get_bone_lookups(armature)
 
     for name in mesh_names:
         mesh = bpy.context.scene.objects[name]
         if not mesh.type == 'MESH':
             continue
         
-        myVertexGroups = [[ ] for _ in range(len(mesh.data.vertices))]
+        vertices = mesh.data.vertices
+        vgroup_names = [vgroup.name for vgroup in mesh.vertex_groups]
+        vgroup_bone_groups = {} # vertex group index: bone group, only looked up the first time a group is used
+        myVertexGroups = [[ ] for _ in range(len(vertices))]
 
-        for v in mesh.data.vertices:
+        for groupVertices, v in zip(myVertexGroups, vertices):
             for g in v.groups:
-                if not len(myVertexGroups[v.index]):
-                    myVertexGroups[v.index].append(g.weight)
+                if not len(groupVertices):
+                    groupVertices.append(g.weight)
                 
-                bone_name = mesh.vertex_groups[g.group].name
-                bone_index = all_bones.index(bone_name)
-                myVertexGroups[v.index].append(bone_dict[bone_index])
+                group_index = g.group
+                if group_index not in vgroup_bone_groups:
+                    vgroup_bone_groups[group_index] = bone_dict[bone_indices[vgroup_names[group_index]]]
+                groupVertices.append(vgroup_bone_groups[group_index])
 
         try:
             for groupVertices in myVertexGroups:
@@ -841,7 +844,31 @@ def get_weight_paints(armature, mesh_names):
 
     return success, vert_weights, vert_bones
 
-def get_mesh_bone(ob):
+def get_bone_lookups(arm, lookup_cache=None):
+    """
+    Maps an armature's bone names to bone indices and its bone group names to the bone group indices meshes use.
+    Pass the same dict as lookup_cache for every mesh so they're only built once per armature
+    """
+    if lookup_cache is not None and arm.name in lookup_cache:
+        return lookup_cache[arm.name]
+
+    bone_groups = arm.pose.bone_groups
+    if len(bone_groups) and bone_groups[0].name == "Null_Bone_Group":
+        bone_groups = bone_groups[1:]
+
+    # first one wins, like list.index
+    bone_indices = {}
+    for i, bone in enumerate(arm.data.bones):
+        bone_indices.setdefault(bone.name, i)
+    bone_group_indices = {}
+    for i, bone_group in enumerate(bone_groups):
+        bone_group_indices.setdefault(bone_group.name, i)
+
+    if lookup_cache is not None:
+        lookup_cache[arm.name] = bone_indices, bone_group_indices
+    return bone_indices, bone_group_indices
+
+def get_mesh_bone(ob, lookup_cache=None):
     """If mesh isn't weight painted, it should contain only one vertex group, which will be the bone the mesh will be assigned to"""
     if ob is None or ob.type != 'MESH':
         raise Exception("input object invalid")
@@ -851,7 +878,7 @@ def get_mesh_bone(ob):
     if not arm:
         raise Exception("armature object not found")
         
-    all_bones = [x.name for x in arm.data.bones]
+    bone_indices, _ = get_bone_lookups(arm, lookup_cache)
 
     # ensure we got the latest assignments and weights
     ob.update_from_editmode()
@@ -864,12 +891,12 @@ def get_mesh_bone(ob):
     if not vgroup_names[0]:
         raise Exception("no vertex groups")
 
-    if vgroup_names[0] not in all_bones:
+    if vgroup_names[0] not in bone_indices:
         raise Exception("bone not found")
 
-    return all_bones.index(vgroup_names[0]), vgroup_names[0]
+    return bone_indices[vgroup_names[0]], vgroup_names[0]
 
-def get_bone_group(ob, bone, is_weighted):
+def get_bone_group(ob, bone, is_weighted, lookup_cache=None):
     """Get the bone group a bone is related to. If it's a weight painted mesh, there is no bone group assigned"""
     if is_weighted:
         return -1
@@ -882,15 +909,12 @@ def get_bone_group(ob, bone, is_weighted):
     if not arm:
         raise Exception("armature object not found")
 
-    if arm.pose.bone_groups[0].name == "Null_Bone_Group":
-        all_bone_groups = [x.name for x in arm.pose.bone_groups[1:]]
-    else:
-        all_bone_groups = [x.name for x in arm.pose.bone_groups]
+    _, bone_group_indices = get_bone_lookups(arm, lookup_cache)
     bone_group = arm.pose.bones[bone].bone_group
-    if bone_group.name not in all_bone_groups:
+    if bone_group.name not in bone_group_indices:
         raise Exception("bone group not found")
 
-    return all_bone_groups.index(bone_group.name)
+    return bone_group_indices[bone_group.name]
 
 def get_bone_group_armature(arm, bone):
     """Get the bone group a bone is related to. (Only used on rig serialization)"""
@@ -956,34 +980,34 @@ def get_bone_group_to_bone_dict(armature):
     
     return bone_dict
 
-def get_bone_visibility_character(armature, bone_group_index):
-    ALWAYS_VISIBLE = 0x46
-    ALWAYS_VISIBLE_2 = 0x1C
+# bones of the character rig whose meshes are always visible, bone index -> visibility
+CHARACTER_ALWAYS_VISIBLE = 0x46
+CHARACTER_ALWAYS_VISIBLE_2 = 0x1C
+CHARACTER_BONE_VISIBILITY = {
+    **dict.fromkeys((3, 4, 5, 6, 7, 8, 10, 11, 12, 30, 31, 32, 40, 41, 42, 60, 61, 62, 63, 64, 65, 66, 67, 68), CHARACTER_ALWAYS_VISIBLE),
+    **dict.fromkeys((9, 27), CHARACTER_ALWAYS_VISIBLE_2),
+}
 
+def get_bone_visibility_character(armature, bone_group_index, bone_dict=None):
     if bone_group_index == -1:
         # weight painted mesh
-        return ALWAYS_VISIBLE
-    
-    always_visible_bones = [3, 4, 5, 6, 7, 8, 10, 11, 12, 30, 31, 32, 40, 41, 42, 60, 61, 62, 63, 64, 65, 66, 67, 68]
-    always_visible_bones_2 = [9, 27]
+        return CHARACTER_ALWAYS_VISIBLE
 
-    bone_dict = get_bone_group_to_bone_dict(armature)
+    if bone_dict is None:
+        bone_dict = get_bone_group_to_bone_dict(armature)
 
     bone_index = bone_dict[bone_group_index]
 
-    if bone_index in always_visible_bones:
-        return ALWAYS_VISIBLE
-    elif bone_index in always_visible_bones_2:
-        return ALWAYS_VISIBLE_2
-    else:
-        return bone_index
+    # any other bone is just its own visibility
+    return CHARACTER_BONE_VISIBILITY.get(bone_index, bone_index)
     
-def get_bone_visibility_general(armature, bone_group_index):
+def get_bone_visibility_general(armature, bone_group_index, bone_dict=None):
     if bone_group_index == -1:
         # weight painted mesh
         return len(armature.data.bones) - 1
     
-    bone_dict = get_bone_group_to_bone_dict(armature)
+    if bone_dict is None:
+        bone_dict = get_bone_group_to_bone_dict(armature)
 
     bone_index = bone_dict[bone_group_index]
 
@@ -1007,35 +1031,14 @@ def serialize_rig(armature) -> bytes:
         bfl = coords.min(axis=0)
         # top back right
         tbr = coords.max(axis=0)
-        G  = np.array((bfl, tbr)).T
-        # bound box coords ie the 8 combinations of bfl tbr.
-        bbc = [i for i in itertools.product(*G)]
-
-        local_bbox = sum((mathutils.Vector(b) for b in bbc), mathutils.Vector()) / 8
-        cx = local_bbox[0]
-        cy = local_bbox[1]
-        cz = local_bbox[2]
+        # the average of all 8 corners is just the midpoint
+        local_bbox = mathutils.Vector((bfl + tbr) * 0.5)
 
         allobj = [o for o in objects if o.type == "MESH"]
+        all_coordinates = np.concatenate([get_vertex_coordinates(o.data) for o in allobj])
 
-        distance = 0
-        max_x = allobj[0].data.vertices[0].co.x
-        max_y = allobj[0].data.vertices[0].co.y
-        max_z = allobj[0].data.vertices[0].co.z
-        for o in allobj:
-            for v in o.data.vertices:
-                tDist = mathutils.Vector((cx - v.co.x,  cy - v.co.y, cz - v.co.z)).length
-                if tDist > distance:
-                    distance = tDist
-                    
-                if v.co.x > max_x:
-                    max_x = v.co.x
-                    
-                if v.co.y > max_y:
-                    max_y = v.co.y
-                    
-                if v.co.z > max_z:
-                    max_z = v.co.z
+        distance = get_max_distance(all_coordinates, local_bbox)
+        max_x, max_y, max_z = (float(m) for m in all_coordinates.max(axis=0))
                     
         return local_bbox, distance, max_x, max_y, max_z
 
@@ -1051,7 +1054,7 @@ def serialize_rig(armature) -> bytes:
         index = bone_names.index(vgroups[0])
         mesh_used_bones[index].append(mesh)
 
-    new_bone_data = bytes()
+    new_bone_data = []
         
     for bone, meshes in zip(armature.data.bones, mesh_used_bones):
         center = (0, 0, 0)
@@ -1093,31 +1096,16 @@ def serialize_rig(armature) -> bytes:
             length = (max_x - bbox_center[0], max_y - bbox_center[1], max_z - bbox_center[2])
         
         # serialize
-        new_bone_data += struct.pack(">I", flags)
-        new_bone_data += struct.pack(">hhhh", bone_group_index, parent_index, child_index, sibling_index)
-        for co in translation:
-            new_bone_data += struct.pack(">f", co)
-            
-        new_bone_data += struct.pack(">i", float_to_bam(rot_x))
-        new_bone_data += struct.pack(">i", float_to_bam(rot_y))
-        new_bone_data += struct.pack(">i", float_to_bam(rot_z))
-        
-        for co in scale:
-            new_bone_data += struct.pack(">f", co)
-            
-        for m in matrix[:3]:
-            for co in m:
-                new_bone_data += struct.pack(">f", co)
-                
-        for co in center:
-            new_bone_data += struct.pack(">f", co)
-            
-        new_bone_data += struct.pack(">f4x", distance)
-            
-        for co in length:
-            new_bone_data += struct.pack(">f", co)
+        new_bone_data.append(BONE_STRUCT.pack(flags, \
+            bone_group_index, parent_index, child_index, sibling_index, \
+            *translation, \
+            float_to_bam(rot_x), float_to_bam(rot_y), float_to_bam(rot_z), \
+            *scale, \
+            *matrix[0], *matrix[1], *matrix[2], \
+            *center, distance, \
+            *length))
     
-    return new_bone_data
+    return b''.join(new_bone_data)
 
 def get_mesh_uvs_with_indices(me):
     """Get's all of the UV coordinates of a mesh with its indices for faces"""
@@ -1125,62 +1113,61 @@ def get_mesh_uvs_with_indices(me):
         return False
     uv_layer = me.uv_layers.active.data
 
-    all_uvs = []
-    indices_to_uvs_for_loops = []
-    new_uv_index = 0
+    loop_uvs = np.empty(len(uv_layer) * 2, dtype=np.float32)
+    uv_layer.foreach_get("uv", loop_uvs)
+    loop_uvs = loop_uvs.reshape(-1, 2) + np.float32(0) # adding 0 turns -0.0 into 0.0 so they count as the same UV
 
-    for poly in me.polygons:
-        
-        for loop_index in poly.loop_indices:
-            vert_uv = uv_layer[loop_index].uv
-            vert_uv_arr = [vert_uv[0], vert_uv[1]]
-            
-            found_existing_uv = False
-            for uv in all_uvs:
-                uv_arr = [uv[0], uv[1]]
-                if vert_uv_arr == uv_arr:
-                    indices_to_uvs_for_loops.append(all_uvs.index(uv))
-                    found_existing_uv = True
-                    break
-                
-            if not found_existing_uv:
-                all_uvs.append(vert_uv)
-                indices_to_uvs_for_loops.append(new_uv_index)
-                new_uv_index += 1          
+    # dedupe on the UV value, np.unique sorts them so put them back in the order they're first used in
+    unique_uvs, first_loops, inverse = np.unique(loop_uvs, axis=0, return_index=True, return_inverse=True)
+    order = np.argsort(first_loops)
+    new_indices = np.empty(len(order), dtype=np.int64)
+    new_indices[order] = np.arange(len(order))
+
+    all_uvs = unique_uvs[order]
+    indices_to_uvs_for_loops = new_indices[inverse.reshape(-1)].tolist()
 
-    return all_uvs, indices_to_uvs_for_loops, new_uv_index
+    return all_uvs, indices_to_uvs_for_loops, len(all_uvs)
 
-def create_vertex_groups(mesh):
+def create_vertex_groups(mesh) -> int:
+    """Creates a vertex group for every bone the mesh doesn't have one for yet, returns how many were created"""
     arm = mesh.find_armature()
     if not arm:
-        return
+        return 0
     
+    created = 0
+    existing_vgroup_names = {vgroup.name for vgroup in mesh.vertex_groups}
     for bone in arm.pose.bones:
-        if bone.name not in mesh.vertex_groups and bone.bone_group.name != "Null_Bone_Group":
-            #print("{} vertex group created".format(bone.name))
+        if bone.name in existing_vgroup_names:
+            continue
+        if bone.bone_group and bone.bone_group.name != "Null_Bone_Group":
+            if bpy.app.debug:
+                print("{} vertex group created".format(bone.name))
             mesh.vertex_groups.new(name=bone.name)
+            created += 1
     
-    # ensure vertex groups are sorted
-    bpy.ops.object.select_all(action='DESELECT')
-    bpy.context.view_layer.objects.active = mesh
-    mesh.select_set(True)
+    # ensure vertex groups are sorted, overriding the context instead of changing the selection
+    override = {"object": mesh, "active_object": mesh, "selected_objects": [mesh]}
+    if hasattr(bpy.context, "temp_override"): # Blender 3.2+
+        with bpy.context.temp_override(**override):
+            bpy.ops.object.vertex_group_sort()
+    else:
+        bpy.ops.object.vertex_group_sort(override)
 
-    bpy.ops.object.vertex_group_sort()
+    return created
 
 def write_NFN0_header(file:File):
     """Writes the filename header"""
-    file.write_32bit_aligned()
+    file.write_32byte_aligned()
 
-    filename = file.get_filename()
+    filename = bytes(file.get_filename(), 'ascii') + b'\x00' # with the string terminator
 
-    header_size = len(filename) + 0x11
+    header_size = len(filename) + NFN0_HEADER_STRUCT.size
     header_size = (header_size + 31) & ~31 # 32 bit alignment
 
-    file.write(struct.pack('<4sI8x', bytes('NFN0', 'ascii'), header_size-0x8))
-    file.write(struct.pack('>{}s'.format(len(filename)+1), bytes(filename, 'ascii')))       
+    file.write(NFN0_HEADER_STRUCT.pack(bytes('NFN0', 'ascii'), header_size-0x8) + filename)
     
 def write_NEND_header(file:File):
     """Writes the end of the file header"""
-    file.write_32bit_aligned()
-    file.write(struct.pack('<4sI', bytes('NEND', 'ascii'), 0x8))
-    file.write_32bit_aligned()
\ No newline at end of file
+    file.write_32byte_aligned()
+    file.write(NEND_HEADER)
+    file.write_32byte_aligned()
\ No newline at end of file